@@ -1,5 +1,6 @@
 import asyncio
 import sys
+from loguru import logger
 from pipecat.frames.frames import EndFrame
 from src.agent.factory import create_react_agent
 
@@ -10,6 +11,22 @@ async def main():
     parser.add_argument("--verbose", action="store_true", help="Enable verbose debug logging")
     parser.add_argument("--mute", action="store_true", help="Mute TTS output (Silent Mode)")
     parser.add_argument("--no-cut", action="store_true", help="Disable barge-in interruption (AI finishes speaking)")
+    parser.add_argument("--aec", choices=["ducking", "nlms"], default=None, help="Software echo handling: mute mic while bot talks (ducking) or adaptive cancellation (nlms)")
+    parser.add_argument("--vad", choices=["webrtc", "energy", "cascade"], default="webrtc", help="VAD backend: webrtcvad, RMS/ZCR energy, or energy-gated webrtcvad (cascade)")
+    parser.add_argument("--guard", nargs="?", const="blocking", choices=["blocking", "speculative"], default=None, help="Screen transcriptions for prompt injection (local heuristic, cached remote classifier); 'speculative' classifies alongside the LLM")
+    parser.add_argument("--dtmf", choices=["gym", "inband"], default="gym", help="Send keypresses to the gym UI server or as in-band tones on the audio output")
+    parser.add_argument("--dtmf-detect", action="store_true", help="Detect keypad tones on the mic and keep them away from STT")
+    parser.add_argument("--context-tokens", type=int, default=3000, help="Prompt token budget; older tool calls are summarized and old turns dropped (0 = full history)")
+    parser.add_argument("--menu-cache", metavar="PATH", default=None, help="SQLite menu-path cache: answer IVR prompts seen on earlier calls without the LLM")
+    parser.add_argument("--goal", default="", help="What the call is for; menu cache entries are kept per goal")
+    parser.add_argument("--speculate-llm", metavar="MS", nargs="?", type=int, const=250, default=0, help="Start the LLM on interim transcripts stable for MS ms (default 250); kept if the final matches")
+    parser.add_argument("--tts-cache", metavar="PATH", default=None, help="SQLite cache of synthesized audio for stock and repeated short replies")
+    parser.add_argument("--first-chunk-ms", metavar="MS", type=int, default=300, help="Send the LLM's first words to the TTS after at most MS ms (0 lets the TTS aggregate whole sentences)")
+    parser.add_argument("--tts-prewarm", metavar="FILE", default=None, help="Phrases (one per line) to synthesize into the TTS cache at startup")
+    parser.add_argument("--input-file", metavar="WAV", default=None, help="Replay this recording (WAV, or 16 kHz 16-bit PCM) instead of using the microphone")
+    parser.add_argument("--output-file", metavar="WAV", default=None, help="With --input-file, record the agent's audio here (speech timestamps in a .jsonl next to it)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed for --input-file (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--trace", metavar="PATH", default=None, help="Append per-turn latency breakdown (JSONL) to PATH")
     
     # If run from gym_runner, we might need to handle unknown args or ignore them if gym_runner adds any?
     # But gym_runner doesn't use argparse.
@@ -19,7 +36,21 @@ async def main():
     
     args, unknown = parser.parse_known_args() # Use parse_known_args just in case
 
-    runner, task = await create_react_agent(verbose=args.verbose, mute_tts=args.mute, allow_interruptions=not args.no_cut)
+    # Process-wide, so here rather than per call in create_react_agent
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "ERROR")
+
+    print("\n--- Pipecat Voice Agent ---")
+    print(f"Mode: {'SILENT (Mute)' if args.mute else 'Voice Active'}")
+    print(f"Barge-in: {'Enabled' if not args.no_cut else 'DISABLED (--no-cut)'}")
+    print("---------------------------\n")
+
+    prewarm = None
+    if args.tts_prewarm:
+        with open(args.tts_prewarm) as f:
+            prewarm = [line.strip() for line in f if line.strip()]
+
+    runner, task = await create_react_agent(mute_tts=args.mute, allow_interruptions=not args.no_cut, trace_path=args.trace, aec_engine=args.aec, vad_backend=args.vad, guard=args.guard, dtmf=args.dtmf, dtmf_detect=args.dtmf_detect, context_tokens=args.context_tokens, menu_cache=args.menu_cache, goal=args.goal, speculate_ms=args.speculate_llm, tts_cache=args.tts_cache, tts_prewarm=prewarm, tts_first_chunk_ms=args.first_chunk_ms, audio_in_file=args.input_file, audio_out_file=args.output_file, audio_speed=args.speed)
 
     print("Starting agent... Press Ctrl+C to exit.")
     
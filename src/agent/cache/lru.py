@@ -0,0 +1,74 @@
+import collections
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Small in-memory LRU cache with optional TTL eviction.
+
+    Entries older than `ttl_s` (None = never expire) are dropped when looked up;
+    past `max_entries` the least recently used entry is evicted. Tracks hits and
+    misses so callers can report a hit rate. `on_evict(key, value)` is called for
+    entries dropped by either rule, so callers can keep side indexes in sync.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: Optional[float] = 3600.0,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._on_evict = on_evict
+        self._entries = collections.OrderedDict()  # key -> (stored_at, value)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if self.ttl_s is None or time.monotonic() - stored_at <= self.ttl_s:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            if self._on_evict:
+                self._on_evict(key, value)
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, (_, old) = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self._on_evict:
+                self._on_evict(evicted, old)
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like get(), without touching recency or hit/miss counts."""
+        entry = self._entries.get(key)
+        if entry is None or (self.ttl_s is not None and time.monotonic() - entry[0] > self.ttl_s):
+            return default
+        return entry[1]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,369 @@
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from pipecat.frames.frames import Frame, EndFrame, CancelFrame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from src.agent.cache.lru import LRUCache
+from src.agent.security.heuristics import has_risk_terms, normalize_text
+from src.agent.tools.executor import ToolUnavailableError
+from src.agent.tools.ivr import press
+
+MenuKey = Tuple[str, str]  # (normalized goal, normalized prompt)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_PRESSED_RE = re.compile(r"Pressed: ([0-9*#]+)")
+# IVR replies that mean the last choice was rejected
+_REJECTED_RE = re.compile(r"\b(?:invalid|not a valid|didn't understand|did not understand|not recognized|try again)\b")
+_OPTION_TOKENS = re.compile(r"^(?:\d+|star|pound|hash|#|\*)$")
+
+
+@dataclass
+class MenuEntry:
+    digits: str
+    tokens: frozenset
+    clauses: Dict[str, frozenset]  # option number -> words of its "... press N" clause
+    uses: int = 0
+
+
+def _tokenize(prompt: str) -> Tuple[frozenset, Dict[str, frozenset]]:
+    """
+    The prompt's word set, and for each option number spoken in it the words since the
+    previous option number ("to pay your bill press" for "2"). Words after the last
+    option belong to no clause.
+    """
+    words = prompt.split()
+    clauses: Dict[str, frozenset] = {}
+    clause = []
+    for word in words:
+        if _OPTION_TOKENS.match(word):
+            clauses[word] = clauses.get(word, frozenset()) | frozenset(clause)
+            clause = []
+        else:
+            clause.append(word)
+    return frozenset(words), clauses
+
+
+def _dice(a: frozenset, b: frozenset) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 1.0
+
+
+def prompt_text(message: dict) -> str:
+    """User message content with the guard's wrapper tags removed."""
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return _TAG_RE.sub(" ", content or "")
+
+
+class MenuCache:
+    """
+    Digits chosen for IVR prompts, keyed by (goal, normalized prompt).
+
+    Lookups try the exact key, then a token-set match (Dice coefficient over word
+    sets, >= `min_similarity`) among entries for the same goal that share at least
+    one word, found through an inverted index. A fuzzy match must also offer the same
+    option numbers, each with a clause that matches its own (Dice >= `min_similarity`):
+    a reordered menu shares every word but pairs them with other digits. Entries live in an LRUCache (size + TTL); with `path`
+    they are also written to SQLite and the freshest unexpired ones reloaded at start.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 2048,
+        ttl_s: Optional[float] = 30 * 24 * 3600.0,
+        min_similarity: float = 0.85,
+        min_tokens: int = 3,
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.min_similarity = min_similarity
+        self.min_tokens = min_tokens
+        self._entries = LRUCache(max_entries=max_entries, ttl_s=ttl_s, on_evict=self._unindex)
+        self._index: Dict[Tuple[str, str], Set[MenuKey]] = {}  # (goal, token) -> keys
+
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.learned = 0
+        self.invalidated = 0
+
+        if path:
+            self._load()
+
+    def key(self, goal: str, prompt: str) -> Optional[MenuKey]:
+        normalized = normalize_text(prompt)
+        if len(normalized.split()) < self.min_tokens or has_risk_terms(normalized):
+            return None
+        return normalize_text(goal), normalized
+
+    def lookup(self, key: MenuKey) -> Optional[Tuple[MenuKey, str]]:
+        goal, prompt = key
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+            entry.uses += 1
+            return key, entry.digits
+
+        tokens, clauses = _tokenize(prompt)
+        candidates = set()
+        for token in tokens:
+            candidates |= self._index.get((goal, token), set())
+        best, best_score = None, self.min_similarity
+        for candidate in candidates:
+            entry = self._entries.peek(candidate)
+            if entry is None or entry.clauses.keys() != clauses.keys():
+                continue
+            score = _dice(tokens, entry.tokens)
+            if score >= best_score and self._clauses_match(clauses, entry.clauses):
+                best, best_score = candidate, score
+        entry = self._entries.get(best) if best else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.fuzzy_hits += 1
+        entry.uses += 1
+        return best, entry.digits
+
+    def _clauses_match(self, clauses: Dict[str, frozenset], learned: Dict[str, frozenset]) -> bool:
+        return all(_dice(words, learned[option]) >= self.min_similarity for option, words in clauses.items())
+
+    def learn(self, key: MenuKey, digits: str) -> MenuEntry:
+        tokens, clauses = _tokenize(key[1])
+        entry = MenuEntry(digits=digits, tokens=tokens, clauses=clauses)
+        self._store(key, entry)
+        self.learned += 1
+        return entry
+
+    def invalidate(self, key: MenuKey):
+        entry = self._entries.pop(key)
+        if entry is not None:
+            self._unindex(key, entry)
+            self.invalidated += 1
+
+    def _store(self, key: MenuKey, entry: MenuEntry):
+        old = self._entries.pop(key)
+        if old is not None:
+            self._unindex(key, old)
+        self._entries.put(key, entry)
+        for token in entry.tokens:
+            self._index.setdefault((key[0], token), set()).add(key)
+
+    def _unindex(self, key: MenuKey, entry: MenuEntry):
+        for token in entry.tokens:
+            keys = self._index.get((key[0], token))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[(key[0], token)]
+
+    # Persistence. Writes are small and rare (one per learned prompt); callers on the
+    # event loop run them with asyncio.to_thread.
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS menu_cache ("
+            "goal TEXT NOT NULL, prompt TEXT NOT NULL, digits TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (goal, prompt))"
+        )
+        return db
+
+    def _load(self):
+        with self._connect() as db:
+            if self.ttl_s is not None:
+                db.execute("DELETE FROM menu_cache WHERE updated_at < ?", (time.time() - self.ttl_s,))
+            rows = db.execute(
+                "SELECT goal, prompt, digits FROM menu_cache ORDER BY updated_at DESC LIMIT ?",
+                (self._entries.max_entries,),
+            ).fetchall()
+        db.close()
+        # Oldest first, so the LRU order matches recency
+        for goal, prompt, digits in reversed(rows):
+            tokens, clauses = _tokenize(prompt)
+            self._store((goal, prompt), MenuEntry(digits=digits, tokens=tokens, clauses=clauses))
+        logger.debug(f"MenuCache: loaded {len(rows)} entries from {self.path}")
+
+    def save(self, key: MenuKey, digits: str):
+        if not self.path:
+            return
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO menu_cache (goal, prompt, digits, updated_at) VALUES (?, ?, ?, ?)",
+                (key[0], key[1], digits, time.time()),
+            )
+        db.close()
+
+    def delete(self, key: MenuKey):
+        if not self.path:
+            return
+        with self._connect() as db:
+            db.execute("DELETE FROM menu_cache WHERE goal = ? AND prompt = ?", key)
+        db.close()
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.fuzzy_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+            "learned": self.learned,
+            "invalidated": self.invalidated,
+            "evictions": self._entries.evictions,
+        }
+
+
+class MenuFastPath(FrameProcessor):
+    """
+    Answers IVR prompts we have navigated before without running the LLM.
+
+    Sits between the user context aggregator and the LLM. When the latest user
+    message (the IVR prompt) matches the MenuCache for this call's goal, the cached
+    digits are pressed directly, the press is recorded in the context as a regular
+    press_digit call/result pair, and the context frame is not forwarded. Otherwise
+    the frame goes to the LLM as usual.
+
+    Entries are learned by wrapping the press_digit tool (`learning(press_digit)`):
+    a successful press is stored for the user message it answered. If the prompt
+    after a fast-path press says the choice was invalid, that entry is dropped.
+    `press` is how digits are sent (a ToolSession's press for per-call sessions).
+    """
+
+    def __init__(self, cache: MenuCache, goal: str = "", press=press):
+        super().__init__()
+        self.cache = cache
+        self.goal = goal
+        self._press = press
+        self.llm_turns_skipped = 0
+        self._last_fast_key: Optional[MenuKey] = None
+        self._learned_for: Optional[int] = None  # id() of the user message last learned from
+        self._learned_digits = ""
+        self._writes = set()
+        self._logged = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            if await self._fast_path(frame.context):
+                return
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            self.log_stats()
+
+        await self.push_frame(frame, direction)
+
+    def _last_user_message(self, context) -> Optional[dict]:
+        for message in reversed(context.get_messages()):
+            role = message.get("role")
+            if role == "user":
+                return message
+            if role != "system":
+                # Tool results and replies after the prompt: not a fresh user turn
+                return None
+        return None
+
+    async def _fast_path(self, context) -> bool:
+        message = self._last_user_message(context)
+        if message is None:
+            return False
+        text = prompt_text(message)
+
+        rejected, self._last_fast_key = self._last_fast_key, None
+        if rejected and _REJECTED_RE.search(normalize_text(text)):
+            logger.info(f"MenuFastPath: IVR rejected cached choice for '{rejected[1]}', dropping it")
+            self.cache.invalidate(rejected)
+            self._persist(self.cache.delete, rejected)
+
+        key = self.cache.key(self.goal, text)
+        if key is None:
+            return False
+        match = self.cache.lookup(key)
+        if match is None:
+            return False
+        matched_key, digits = match
+
+        try:
+            pressed = await self._press(digits, self)
+        except ToolUnavailableError:
+            pressed = None
+        if not pressed:
+            return False
+
+        logger.info(f"MenuFastPath: pressed {pressed} from cache for '{key[1]}'")
+        self.llm_turns_skipped += 1
+        self._last_fast_key = matched_key
+        call_id = f"menu_cache_{self.llm_turns_skipped}"
+        context.add_message({
+            "role": "assistant",
+            "tool_calls": [{
+                "id": call_id,
+                "type": "function",
+                "function": {"name": "press_digit", "arguments": json.dumps({"digits": pressed})},
+            }],
+        })
+        context.add_message({"role": "tool", "tool_call_id": call_id, "content": json.dumps(f"Pressed: {pressed}")})
+        return True
+
+    def learning(self, handler):
+        """Wraps a press_digit handler so successful presses are learned for their prompt."""
+
+        async def press_digit(params):
+            result = await handler(params)
+            match = _PRESSED_RE.search(result) if isinstance(result, str) else None
+            message = self._last_prompt(params.context) if match else None
+            if message is not None:
+                self._learn(message, match.group(1))
+            return result
+
+        return press_digit
+
+    def _last_prompt(self, context) -> Optional[dict]:
+        for message in reversed(context.get_messages()):
+            if message.get("role") == "user":
+                return message
+        return None
+
+    def _learn(self, message: dict, digits: str):
+        key = self.cache.key(self.goal, prompt_text(message))
+        if key is None:
+            return
+        # Several presses answering one prompt are one choice
+        if self._learned_for == id(message):
+            digits = self._learned_digits + digits
+        self._learned_for = id(message)
+        self._learned_digits = digits
+        self.cache.learn(key, digits)
+        self._persist(self.cache.save, key, digits)
+
+    def _persist(self, fn, *args):
+        if not self.cache.path:
+            return
+        task = asyncio.create_task(asyncio.to_thread(fn, *args))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "llm_turns_skipped": self.llm_turns_skipped}
+
+    def log_stats(self):
+        if self._logged:
+            return
+        self._logged = True
+        s = self.stats()
+        logger.info(
+            f"MenuFastPath: {s['lookups']} lookups, {s['exact_hits']} exact / {s['fuzzy_hits']} fuzzy hits "
+            f"({s['hit_rate']:.0%}), {s['llm_turns_skipped']} LLM turns skipped, {s['learned']} learned, "
+            f"{s['invalidated']} invalidated, {s['entries']} entries"
+        )
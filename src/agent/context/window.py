@@ -0,0 +1,290 @@
+import asyncio
+import functools
+import json
+import re
+from typing import List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import Frame, EndFrame, CancelFrame
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+SUMMARY_TAG = "call_progress"
+# Chat-format overhead per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+_PRESSED_RE = re.compile(r"Pressed: ([0-9*#]+)")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(name: str):
+    # get_encoding downloads the BPE table on first use; loaded once per process
+    if tiktoken is None:
+        logger.warning("TokenEstimator: tiktoken not installed, using character estimate")
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"TokenEstimator: tiktoken encoding {name} unavailable ({e!r}), using character estimate")
+        return None
+
+
+async def preload_encoding(name: str = "o200k_base"):
+    """Loads the tokenizer table in a thread, so TokenEstimators built afterwards don't block the loop."""
+    await asyncio.to_thread(_load_encoding, name)
+
+
+class TokenEstimator:
+    """
+    Prompt size in tokens. Uses tiktoken's o200k_base (the gpt-oss vocabulary family)
+    when its table is available, else ~4 characters per token. Call preload_encoding()
+    first when constructing on the event loop.
+    """
+
+    def __init__(self, encoding: str = "o200k_base"):
+        self._encoding = _load_encoding(encoding)
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def message_tokens(self, message: dict) -> int:
+        tokens = MESSAGE_OVERHEAD_TOKENS + self.count(_content_text(message))
+        for call in message.get("tool_calls") or []:
+            fn = call.get("function", {})
+            tokens += self.count(fn.get("name", "")) + self.count(fn.get("arguments", ""))
+        return tokens
+
+
+def _content_text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _is_summary(message: dict) -> bool:
+    return message.get("role") == "system" and _content_text(message).startswith(f"<{SUMMARY_TAG}>")
+
+
+class ContextWindowManager(FrameProcessor):
+    """
+    Bounds the LLM context so prompt size (and Groq TTFT) stays flat over long calls.
+
+    Sits between the user context aggregator and the LLM and rewrites the context in
+    place on every user turn before forwarding it:
+
+    1. The leading system prompt and the tool list are never touched, so every request
+       starts with the same cacheable prefix.
+    2. Tool-call/result pairs older than the last `keep_tool_calls` are removed and
+       folded into one summary message after the system prompt: digits pressed so far
+       and the menu path (the tail of the IVR prompt each press answered).
+    3. If the estimate still exceeds `max_tokens`, whole turns (from one user message
+       to the next) are dropped oldest first, and their presses folded in as well. The
+       latest turn is always kept.
+
+    Follow-up runs after a tool result are sent upstream from the assistant aggregator
+    straight to the LLM and are not rewritten; they are trimmed on the next user turn.
+    """
+
+    def __init__(
+        self,
+        tools: Optional[list] = None,
+        max_tokens: int = 3000,
+        keep_tool_calls: int = 2,
+        max_path_steps: int = 8,
+        prompt_tail_chars: int = 80,
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.keep_tool_calls = keep_tool_calls
+        self.max_path_steps = max_path_steps
+        self.prompt_tail_chars = prompt_tail_chars
+        self.estimator = TokenEstimator()
+        self._tools_tokens = self.estimator.count(json.dumps(tools)) if tools else 0
+
+        self._digits: List[str] = []
+        self._path: List[str] = []
+
+        self.turns = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.total_prompt_tokens = 0
+        self.collapsed_tool_calls = 0
+        self.dropped_messages = 0
+        self._logged = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            self.manage(frame.context)
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            self.log_stats()
+
+        await self.push_frame(frame, direction)
+
+    def manage(self, context):
+        messages = list(context.get_messages())
+        prefix = []
+        while messages and messages[0].get("role") == "system" and not _is_summary(messages[0]):
+            prefix.append(messages.pop(0))
+        messages = [m for m in messages if not _is_summary(m)]
+
+        messages = self._collapse_tool_calls(messages)
+        messages = self._apply_budget(prefix, messages)
+
+        summary = self._summary_message()
+        managed = prefix + ([summary] if summary else []) + messages
+        context.set_messages(managed)
+
+        tokens = self._tools_tokens + sum(self.estimator.message_tokens(m) for m in managed)
+        self.turns += 1
+        self.last_prompt_tokens = tokens
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+        self.total_prompt_tokens += tokens
+        logger.debug(f"ContextWindow: turn {self.turns} ~{tokens} prompt tokens, {len(managed)} messages")
+
+    def _collapse_tool_calls(self, messages: List[dict]) -> List[dict]:
+        # Tool calls whose results are all in; only those can be folded without leaving orphans
+        results = {m.get("tool_call_id"): m for m in messages if m.get("role") == "tool"}
+        complete = [
+            m for m in messages
+            if m.get("role") == "assistant" and m.get("tool_calls") and all(
+                c.get("id") in results and _content_text(results[c.get("id")]) != '"IN_PROGRESS"'
+                for c in m["tool_calls"]
+            )
+        ]
+        remaining = sum(len(m["tool_calls"]) for m in complete)
+        if remaining <= self.keep_tool_calls:
+            return messages
+
+        # Fold oldest first, whole assistant messages, until at most keep_tool_calls remain
+        fold = set()
+        for m in complete:
+            if remaining <= self.keep_tool_calls:
+                break
+            fold.add(id(m))
+            remaining -= len(m["tool_calls"])
+
+        kept = []
+        folded_ids = set()
+        last_prompt = ""
+        for m in messages:
+            if m.get("role") == "user":
+                last_prompt = _content_text(m)
+            if id(m) in fold:
+                for call in m["tool_calls"]:
+                    folded_ids.add(call.get("id"))
+                    self._record_call(call, results.get(call.get("id")), last_prompt)
+                    self.collapsed_tool_calls += 1
+                if _content_text(m):
+                    # Keep what the bot said alongside the call
+                    kept.append({"role": "assistant", "content": m["content"]})
+                continue
+            if m.get("role") == "tool" and m.get("tool_call_id") in folded_ids:
+                continue
+            kept.append(m)
+        return kept
+
+    def _apply_budget(self, prefix: List[dict], messages: List[dict]) -> List[dict]:
+        budget = self.max_tokens - self._tools_tokens - sum(self.estimator.message_tokens(m) for m in prefix)
+        # Room for the summary message, which grows as turns are folded in
+        budget -= self.estimator.message_tokens(self._summary_message() or {}) + 32
+        sizes = [self.estimator.message_tokens(m) for m in messages]
+        total = sum(sizes)
+        if total <= budget:
+            return messages
+
+        starts = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+        cut = 0
+        for start in starts[1:]:
+            if total <= budget:
+                break
+            total -= sum(sizes[cut:start])
+            cut = start
+        if not cut:
+            return messages
+
+        self._absorb(messages[:cut])
+        self.dropped_messages += cut
+        kept = messages[cut:]
+        # A result that landed after the cut must not outlive its call
+        call_ids = {c.get("id") for m in kept for c in m.get("tool_calls") or []}
+        return [m for m in kept if m.get("role") != "tool" or m.get("tool_call_id") in call_ids]
+
+    def _absorb(self, messages: List[dict]):
+        results = {m.get("tool_call_id"): m for m in messages if m.get("role") == "tool"}
+        last_prompt = ""
+        for m in messages:
+            if m.get("role") == "user":
+                last_prompt = _content_text(m)
+            for call in m.get("tool_calls") or []:
+                self._record_call(call, results.get(call.get("id")), last_prompt)
+
+    def _record_call(self, call: dict, result: Optional[dict], prompt: str):
+        if call.get("function", {}).get("name") != "press_digit" or result is None:
+            return
+        match = _PRESSED_RE.search(_content_text(result))
+        if not match:
+            return
+        digits = match.group(1)
+        self._digits.append(digits)
+        prompt = " ".join(_TAG_RE.sub(" ", prompt).split())
+        if len(prompt) > self.prompt_tail_chars:
+            prompt = "..." + prompt[-self.prompt_tail_chars:]
+        self._path.append(f'"{prompt}" -> {digits}' if prompt else digits)
+
+    def _summary_message(self) -> Optional[dict]:
+        if not self._digits:
+            return None
+        digits = " ".join(self._digits[-self.max_path_steps * 4:])
+        if len(self._digits) > self.max_path_steps * 4:
+            digits = "... " + digits
+        path = self._path[-self.max_path_steps:]
+        if len(self._path) > len(path):
+            path = [f"({len(self._path) - len(path)} earlier steps)"] + path
+        lines = [
+            f"<{SUMMARY_TAG}>",
+            "Earlier tool calls, summarized.",
+            f"Digits pressed so far: {digits}",
+            "Menu path:",
+            *(f"- {step}" for step in path),
+            f"</{SUMMARY_TAG}>",
+        ]
+        return {"role": "system", "content": "\n".join(lines)}
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "avg_prompt_tokens": self.total_prompt_tokens / self.turns if self.turns else 0.0,
+            "collapsed_tool_calls": self.collapsed_tool_calls,
+            "dropped_messages": self.dropped_messages,
+            "exact_tokens": self.estimator.exact,
+        }
+
+    def log_stats(self):
+        if self._logged:
+            return
+        self._logged = True
+        s = self.stats()
+        logger.info(
+            f"ContextWindow: {s['turns']} turns, prompt ~{s['avg_prompt_tokens']:.0f} avg / "
+            f"{s['max_prompt_tokens']} max tokens, {s['collapsed_tool_calls']} tool calls summarized, "
+            f"{s['dropped_messages']} messages dropped"
+        )
@@ -0,0 +1,275 @@
+import asyncio
+import re
+import time
+from typing import List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    Frame,
+    TranscriptionFrame,
+    InterimTranscriptionFrame,
+    EndFrame,
+    CancelFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.groq.llm import GroqLLMService
+
+from src.agent.security.heuristics import normalize_text
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _match_text(content) -> str:
+    """User message content as compared between speculation and final: tags stripped, normalized."""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return normalize_text(_TAG_RE.sub(" ", content or ""))
+
+
+class _Speculation:
+    def __init__(self, anchor: Optional[dict], normalized: str):
+        self.anchor = anchor  # last context message when the speculation started
+        self.normalized = normalized
+        self.started = time.monotonic()
+        self.first_chunk_at: Optional[float] = None
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SpeculativeGroqLLMService(GroqLLMService):
+    """
+    GroqLLMService that can start a completion before the user turn is final.
+
+    `speculate()` sends the current context plus a predicted user message and buffers
+    the streamed chunks. When the pipeline then asks for a completion whose last
+    message is that user message (same normalized text) on top of the same history,
+    the buffered stream is replayed (and continued live) instead of opening a new
+    request; otherwise the speculation is cancelled and a normal request is made.
+
+    Saved time per hit is min(hit time, first speculative chunk) - speculation start:
+    the head start on time-to-first-token the turn actually got.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._speculation: Optional[_Speculation] = None
+        self.completions = 0
+        self.speculations = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.saved_ms: List[float] = []
+
+    def speculate(self, context, user_content: str):
+        """Starts a speculative completion for `context` + a user message with `user_content`."""
+        messages = context.get_messages()
+        spec = _Speculation(messages[-1] if messages else None, _match_text(user_content))
+        params = {
+            "messages": messages + [{"role": "user", "content": user_content}],
+            "tools": context.tools,
+            "tool_choice": context.tool_choice,
+        }
+        spec.task = self.create_task(self._prefetch(spec, params))
+        self._speculation = spec
+        self.speculations += 1
+        logger.debug(f"{self}: speculating on '{spec.normalized}'")
+
+    @property
+    def speculating_on(self) -> Optional[str]:
+        return self._speculation.normalized if self._speculation else None
+
+    async def discard_speculation(self):
+        spec, self._speculation = self._speculation, None
+        if spec:
+            self.discarded += 1
+            await self._cancel(spec)
+
+    async def _prefetch(self, spec: _Speculation, params):
+        try:
+            stream = await super().get_chat_completions(params)
+            async for chunk in stream:
+                if spec.first_chunk_at is None:
+                    spec.first_chunk_at = time.monotonic()
+                spec.chunks.put_nowait(chunk)
+        except Exception as e:
+            spec.chunks.put_nowait(e)
+        spec.chunks.put_nowait(None)
+
+    async def _cancel(self, spec: _Speculation):
+        if spec.task and not spec.task.done():
+            await self.cancel_task(spec.task)
+
+    async def get_chat_completions(self, params_from_context):
+        self.completions += 1
+        messages = params_from_context["messages"]
+        if self._speculation is None or not messages or messages[-1].get("role") != "user":
+            # Tool-result follow-ups run while the next prompt is often being speculated
+            # on; that speculation belongs to the next user turn, so leave it alone
+            return await super().get_chat_completions(params_from_context)
+        spec, self._speculation = self._speculation, None
+
+        if (
+            len(messages) >= 2
+            and messages[-2] is spec.anchor
+            and _match_text(messages[-1].get("content")) == spec.normalized
+        ):
+            self.hits += 1
+            return self._replay(spec, time.monotonic())
+
+        self.misses += 1
+        await self._cancel(spec)
+        return await super().get_chat_completions(params_from_context)
+
+    async def _replay(self, spec: _Speculation, hit_at: float):
+        try:
+            first = True
+            while True:
+                chunk = await spec.chunks.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if first:
+                    first = False
+                    saved_ms = (min(hit_at, spec.first_chunk_at) - spec.started) * 1000
+                    self.saved_ms.append(saved_ms)
+                    logger.debug(f"{self}: speculative hit, {saved_ms:.0f} ms head start")
+                yield chunk
+        finally:
+            await self._cancel(spec)
+
+    def stats(self) -> dict:
+        return {
+            "completions": self.completions,
+            "speculations": self.speculations,
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+            "hit_rate": self.hits / self.speculations if self.speculations else 0.0,
+            "avg_saved_ms": sum(self.saved_ms) / len(self.saved_ms) if self.saved_ms else 0.0,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"Speculative LLM: {s['speculations']} started, {s['hits']} used ({s['hit_rate']:.0%}), "
+            f"{s['misses']} mismatched at the final, {s['discarded']} dropped early; "
+            f"{s['avg_saved_ms']:.0f} ms saved per hit"
+        )
+
+
+class InterimSpeculator(FrameProcessor):
+    """
+    Starts the LLM early on stable interim transcripts.
+
+    Sits after STT (and the guard) and ahead of the user context aggregator. Once an
+    interim has not changed for `stable_ms`, the predicted user message (finals of the
+    turn so far plus the interim, joined the way the aggregator joins them) is handed
+    to `llm.speculate()`. A newer differing interim, or a final that no longer fits the
+    prediction, drops the speculation; whether it is used is decided by the LLM when
+    the real context arrives.
+
+    `wrap_untrusted` mirrors PressureGuard's wrapping of the interim so the predicted
+    message matches what the guard will forward. A speculative reply is only used if
+    the final passes the guard unchanged.
+
+    Turns end when the user aggregator emits the turn's context: place `turn_end()`
+    right after it, so turns answered without the LLM (MenuFastPath) end too.
+    """
+
+    def __init__(
+        self,
+        llm: SpeculativeGroqLLMService,
+        context,
+        stable_ms: int = 250,
+        min_words: int = 2,
+        wrap_untrusted: bool = False,
+    ):
+        super().__init__()
+        self._llm = llm
+        self._context = context
+        self.stable_s = stable_ms / 1000
+        self.min_words = min_words
+        self._wrap = wrap_untrusted
+        self._finals: List[str] = []
+        self.turns = 0  # user turns aggregated so far (counted by turn_end())
+        self._turn = 0  # self.turns when the current finals started
+        self._stable_task = None
+        self._logged = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, InterimTranscriptionFrame):
+            await self._sync_turn()
+            if frame.text.strip():
+                await self._restart_timer(frame.text)
+        elif isinstance(frame, TranscriptionFrame):
+            await self._sync_turn()
+            await self._cancel_timer()
+            if frame.text.strip():
+                self._finals.append(frame.text)
+                so_far = _match_text(" ".join(self._finals))
+                predicted = self._llm.speculating_on
+                if predicted is not None and not (predicted + " ").startswith(so_far + " "):
+                    await self._llm.discard_speculation()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            await self._cancel_timer()
+            await self._llm.discard_speculation()
+            self.log_stats()
+
+        await self.push_frame(frame, direction)
+
+    def turn_end(self) -> FrameProcessor:
+        """Processor that marks the end of a user turn; goes right after the user aggregator."""
+        return _TurnEnd(self)
+
+    async def _sync_turn(self):
+        # A user turn was aggregated since the last transcript: start a new one
+        if self.turns != self._turn:
+            self._turn = self.turns
+            self._finals.clear()
+            # Still pending: the turn was answered without the LLM (or differently)
+            await self._llm.discard_speculation()
+
+    async def _restart_timer(self, interim: str):
+        await self._cancel_timer()
+        self._stable_task = self.create_task(self._on_stable(interim))
+
+    async def _cancel_timer(self):
+        if self._stable_task:
+            await self.cancel_task(self._stable_task)
+            self._stable_task = None
+
+    async def _on_stable(self, interim: str):
+        await asyncio.sleep(self.stable_s)
+        self._stable_task = None
+        interim = f"<untrusted_input>{interim}</untrusted_input>" if self._wrap else interim
+        content = " ".join(self._finals + [interim])
+        normalized = _match_text(content)
+        if len(normalized.split()) < self.min_words or normalized == self._llm.speculating_on:
+            return
+        await self._llm.discard_speculation()
+        self._llm.speculate(self._context, content)
+
+    def log_stats(self):
+        if self._logged:
+            return
+        self._logged = True
+        self._llm.log_stats()
+
+
+class _TurnEnd(FrameProcessor):
+    """Counts user turns for an InterimSpeculator as the user aggregator emits them."""
+
+    def __init__(self, speculator: InterimSpeculator):
+        super().__init__()
+        self._speculator = speculator
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            self._speculator.turns += 1
+        await self.push_frame(frame, direction)
@@ -0,0 +1,54 @@
+import bisect
+from typing import List, Sequence
+
+# Bucket upper bounds in ms; the last bucket is open-ended
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram. Recording is a bisect and an increment, so it is
+    cheap enough for every call; percentiles are read off bucket bounds (upper
+    bound of the bucket the rank falls in, capped at the max), plus exact max and mean.
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(buckets_ms)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(self.bounds[i], self.max_ms) if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": self.max_ms,
+        }
+
+    def format_buckets(self) -> str:
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return " ".join(f"{label}:{c}" for label, c in zip(labels, self.counts) if c)
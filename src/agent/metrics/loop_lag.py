@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import Optional
+
+from src.agent.metrics.histogram import LatencyHistogram
+
+
+class LoopLagMonitor:
+    """
+    Event-loop lag: how late a periodic `interval_ms` sleep wakes up. Anything that
+    blocks the loop (DSP in a processor, a sync call) shows up here, and it delays
+    every pipeline on the loop by the same amount.
+
+    `current_ms` is an exponential moving average of recent samples (what admission
+    decisions look at); every sample also goes into `histogram`.
+    """
+
+    def __init__(self, interval_ms: float = 100.0, smoothing: float = 0.2):
+        self.interval_s = interval_ms / 1000
+        self.smoothing = smoothing
+        self.histogram = LatencyHistogram()
+        self.current_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval_s)
+            lag_ms = max(0.0, (time.perf_counter() - start - self.interval_s) * 1000)
+            self.histogram.record(lag_ms)
+            self.current_ms += self.smoothing * (lag_ms - self.current_ms)
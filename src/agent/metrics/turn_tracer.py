@@ -0,0 +1,205 @@
+import json
+from typing import Optional, List, Dict
+
+import numpy as np
+from loguru import logger
+
+from pipecat.observers.base_observer import BaseObserver
+from pipecat.frames.frames import (
+    UserStartedSpeakingFrame,
+    VADUserStoppedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    FunctionCallInProgressFrame,
+    FunctionCallResultFrame,
+    TTSAudioRawFrame,
+    BotStartedSpeakingFrame,
+    MetricsFrame,
+    EndFrame,
+    CancelFrame,
+)
+from pipecat.metrics.metrics import TTFBMetricsData, ProcessingMetricsData, LLMUsageMetricsData
+
+# Stage name -> (from mark, to mark). Missing marks leave the stage out of the record.
+STAGES = {
+    "stt_final": ("vad_stop", "final_transcript"),
+    "llm_ttft": ("final_transcript", "llm_first_token"),
+    "tool": ("tool_dispatch", "tool_complete"),
+    "tts_ttfb": ("llm_first_token", "tts_first_audio"),
+    "transport_out": ("tts_first_audio", "audio_out"),
+    "response": ("final_transcript", "audio_out"),
+    "total": ("vad_stop", "audio_out"),
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class TurnTracer(BaseObserver):
+    """
+    Per-turn latency breakdown across VAD, STT, LLM, tools, TTS and transport.
+
+    Marks are taken from the pipeline clock timestamp of each FramePushed event (not
+    from when the observer gets to run), attributed to processors by identity. A turn
+    opens when the user starts speaking and is emitted when the bot's first audio
+    leaves `transport.output()`, or when the next turn / the pipeline end forces it.
+    Each turn is appended as one JSON line to `jsonl_path`; `summary()` returns
+    p50/p95/p99 per stage. TTFB/processing metrics from `enable_metrics=True` and LLM
+    prompt tokens from `enable_usage_metrics=True` are attached to the turn they
+    arrived in.
+    """
+
+    def __init__(
+        self,
+        transport_input,
+        stt,
+        llm,
+        tts,
+        transport_output,
+        jsonl_path: Optional[str] = None,
+    ):
+        super().__init__()
+        self._transport_input = transport_input
+        self._stt = stt
+        self._llm = llm
+        self._tts = tts
+        self._transport_output = transport_output
+        self._jsonl_path = jsonl_path
+        self._turn_index = 0
+        self._turn: Optional[Dict] = None
+        self._llm_started = False
+        self._finished = False
+        self.records: List[Dict] = []
+
+    def _open_turn(self):
+        self._turn_index += 1
+        self._turn = {"marks": {}, "tools": [], "metrics": {}}
+        self._llm_started = False
+
+    def _mark(self, name: str, timestamp: int, first_only: bool = True):
+        if self._turn is None:
+            self._open_turn()
+        marks = self._turn["marks"]
+        if first_only and name in marks:
+            return
+        marks[name] = timestamp
+
+    async def on_push_frame(self, data):
+        frame = data.frame
+        source = data.source
+        ts = data.timestamp
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            # Broadcast both ways by the input transport; a new utterance closes
+            # whatever the previous turn got to
+            if source is not self._transport_input:
+                return
+            if self._turn is not None and self._turn["marks"]:
+                self._emit_turn()
+            if self._turn is None:
+                self._open_turn()
+        elif isinstance(frame, (VADUserStoppedSpeakingFrame, UserStoppedSpeakingFrame)):
+            if source is self._transport_input:
+                self._mark("vad_stop", ts, first_only=False)
+        elif isinstance(frame, InterimTranscriptionFrame):
+            if source is self._stt:
+                self._mark("first_interim", ts)
+        elif isinstance(frame, TranscriptionFrame):
+            if source is self._stt:
+                self._mark("final_transcript", ts, first_only=False)
+        elif isinstance(frame, LLMFullResponseStartFrame):
+            if source is self._llm:
+                self._mark("llm_start", ts)
+                self._llm_started = True
+        elif isinstance(frame, LLMTextFrame):
+            if source is self._llm and self._llm_started:
+                self._mark("llm_first_token", ts)
+        elif isinstance(frame, FunctionCallInProgressFrame):
+            if source is self._llm:
+                self._mark("tool_dispatch", ts)
+                self._turn["tools"].append({"name": frame.function_name, "dispatch": ts})
+        elif isinstance(frame, FunctionCallResultFrame):
+            if source is self._llm and self._turn is not None:
+                self._mark("tool_complete", ts, first_only=False)
+                for tool in self._turn["tools"]:
+                    if tool["name"] == frame.function_name and "complete" not in tool:
+                        tool["complete"] = ts
+                        break
+        elif isinstance(frame, TTSAudioRawFrame):
+            if source is self._tts:
+                self._mark("tts_first_audio", ts)
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            if source is self._transport_output and self._turn is not None:
+                self._mark("audio_out", ts)
+                self._emit_turn()
+        elif isinstance(frame, MetricsFrame):
+            if self._turn is not None:
+                self._record_metrics(frame)
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            if not self._finished:
+                self._finished = True
+                if self._turn is not None:
+                    self._emit_turn()
+                self.log_summary()
+
+    def _record_metrics(self, frame: MetricsFrame):
+        for d in frame.data:
+            if isinstance(d, TTFBMetricsData) and d.value > 0:
+                self._turn["metrics"][f"{d.processor}.ttfb_ms"] = round(d.value * 1000, 1)
+            elif isinstance(d, ProcessingMetricsData) and d.value > 0:
+                self._turn["metrics"][f"{d.processor}.processing_ms"] = round(d.value * 1000, 1)
+            elif isinstance(d, LLMUsageMetricsData):
+                self._turn["metrics"]["llm.prompt_tokens"] = d.value.prompt_tokens
+                if d.value.cache_read_input_tokens:
+                    self._turn["metrics"]["llm.cached_tokens"] = d.value.cache_read_input_tokens
+
+    def _emit_turn(self):
+        turn = self._turn
+        self._turn = None
+        marks = turn["marks"]
+        if not marks:
+            return
+
+        # Marks relative to VAD stop, or to the earliest mark when VAD never fired
+        origin = marks.get("vad_stop", min(marks.values()))
+        record = {
+            "turn": self._turn_index,
+            "marks_ms": {k: round((v - origin) / 1e6, 1) for k, v in sorted(marks.items(), key=lambda kv: kv[1])},
+            "stages_ms": {},
+            "tools": [
+                {"name": t["name"], "ms": round((t["complete"] - t["dispatch"]) / 1e6, 1)}
+                for t in turn["tools"] if "complete" in t
+            ],
+            "metrics": turn["metrics"],
+        }
+        for stage, (start, end) in STAGES.items():
+            if start in marks and end in marks and marks[end] >= marks[start]:
+                record["stages_ms"][stage] = round((marks[end] - marks[start]) / 1e6, 1)
+
+        self.records.append(record)
+        logger.debug(f"TurnTracer: {record['stages_ms']}")
+        if self._jsonl_path:
+            with open(self._jsonl_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (ms) per stage over all emitted turns."""
+        result = {}
+        for stage in STAGES:
+            values = [r["stages_ms"][stage] for r in self.records if stage in r["stages_ms"]]
+            if not values:
+                continue
+            pcts = np.percentile(values, PERCENTILES)
+            result[stage] = {f"p{p}": round(float(v), 1) for p, v in zip(PERCENTILES, pcts)}
+            result[stage]["n"] = len(values)
+        return result
+
+    def log_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print("\n--- Turn latency (ms) ---")
+        for stage, stats in summary.items():
+            print(f"{stage:>14}: p50={stats['p50']:>7} p95={stats['p95']:>7} p99={stats['p99']:>7} (n={stats['n']})")
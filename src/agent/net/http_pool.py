@@ -0,0 +1,132 @@
+import time
+import asyncio
+import aiohttp
+from dataclasses import dataclass
+from typing import Optional
+
+from loguru import logger
+
+
+@dataclass
+class HTTPPoolStats:
+    requests: int = 0
+    failures: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.total_latency_ms / self.requests
+
+
+class HTTPPool:
+    """
+    Shared keep-alive HTTP client for the gym server (UI telemetry + IVR tools).
+
+    One aiohttp.ClientSession is opened lazily on first use and reused for every
+    request, so transcript lines, thoughts and key presses stop paying for a new
+    TCP connection on the event loop that also carries the audio pipeline.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_connections: int = 8,
+        max_concurrency: int = 4,
+        timeout_s: float = 2.0,
+        connect_timeout_s: float = 0.5,
+        keepalive_s: float = 30.0,
+        max_long_polls: int = 32,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.stats = HTTPPoolStats()
+        self._max_connections = max_connections
+        self._max_long_polls = max_long_polls
+        self._keepalive_s = keepalive_s
+        self._timeout = aiohttp.ClientTimeout(total=timeout_s, sock_connect=connect_timeout_s)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Long polls wait on the server for seconds; they get their own connections
+        # and limit so they never hold a slot that presses and telemetry need.
+        self._poll_semaphore = asyncio.Semaphore(max_long_polls)
+        self._poll_session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    def _open_session(self, limit: int) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=limit, keepalive_timeout=self._keepalive_s)
+        return aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.closed:
+            self._session = self._open_session(self._max_connections)
+        return self._session
+
+    def _get_poll_session(self) -> aiohttp.ClientSession:
+        if self._poll_session is None or self._poll_session.closed:
+            self._poll_session = self._open_session(self._max_long_polls)
+        return self._poll_session
+
+    async def post_json(self, path: str, payload, timeout_s: Optional[float] = None) -> Optional[int]:
+        """
+        POSTs `payload` as JSON to `path` on the gym server.
+        Returns the HTTP status, or None if the request failed (server down, timeout...).
+        `timeout_s` overrides the pool's total timeout.
+        """
+        return await self._post(self._get_session(), self._semaphore, path, payload, timeout_s)
+
+    async def long_poll(self, path: str, payload, timeout_s: float) -> Optional[int]:
+        """
+        Like post_json, for requests the server holds open until something happens
+        (up to `timeout_s`). Runs outside the `max_concurrency` limit, on separate
+        connections, at most `max_long_polls` at once.
+        """
+        return await self._post(self._get_poll_session(), self._poll_semaphore, path, payload, timeout_s)
+
+    async def _post(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        path: str,
+        payload,
+        timeout_s: Optional[float],
+    ) -> Optional[int]:
+        start = time.perf_counter()
+        status = None
+        kwargs = {}
+        if timeout_s is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout_s, sock_connect=self._timeout.sock_connect)
+        async with semaphore:
+            try:
+                async with session.post(f"{self.base_url}{path}", json=payload, **kwargs) as response:
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f"HTTPPool: POST {path} failed: {e!r}")
+
+        latency = (time.perf_counter() - start) * 1000
+        self.stats.requests += 1
+        self.stats.total_latency_ms += latency
+        self.stats.max_latency_ms = max(self.stats.max_latency_ms, latency)
+        if status is None or status >= 400:
+            self.stats.failures += 1
+        return status
+
+    async def close(self):
+        """Closes the pooled sessions. Safe to call more than once."""
+        if self._poll_session is not None and not self._poll_session.closed:
+            await self._poll_session.close()
+        self._poll_session = None
+        if self.closed:
+            self._session = None
+            return
+        await self._session.close()
+        self._session = None
+        s = self.stats
+        logger.debug(
+            f"HTTPPool closed: requests={s.requests} failures={s.failures} "
+            f"avg={s.avg_latency_ms:.1f}ms max={s.max_latency_ms:.1f}ms"
+        )
@@ -0,0 +1,137 @@
+import asyncio
+import collections
+from typing import Optional
+
+from loguru import logger
+
+from src.agent.net.http_pool import HTTPPool
+
+# What to do when the queue is full
+DROP_OLDEST = "drop_oldest"   # evict the oldest queued event to make room
+DROP_NEWEST = "drop_newest"   # discard the incoming event
+COALESCE = "coalesce"         # merge into the newest queued event of the same role, else drop oldest
+
+class TelemetryQueue:
+    """
+    Fire-and-forget UI telemetry (transcripts, thoughts, bot replies).
+
+    `emit()` never awaits: events go into a bounded in-memory queue and a background
+    flusher POSTs them to the gym server as one batch per flush interval. A slow or
+    dead server therefore only costs dropped UI lines, never pipeline latency.
+    """
+
+    def __init__(
+        self,
+        http_pool: HTTPPool,
+        path: str = "/api/transcription/batch",
+        max_queue: int = 256,
+        max_batch: int = 64,
+        flush_interval_s: float = 0.1,
+        policy: str = COALESCE,
+    ):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, COALESCE):
+            raise ValueError(f"Unknown telemetry policy: {policy}")
+        self._http_pool = http_pool
+        self._path = path
+        self._max_queue = max_queue
+        self._max_batch = max_batch
+        self._flush_interval_s = flush_interval_s
+        self._policy = policy
+        self._queue = collections.deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def emit(self, role: str, text: str):
+        """Queues one UI event. Safe to call from any coroutine on the loop; never blocks."""
+        if self._closing or not text:
+            return
+
+        if len(self._queue) >= self._max_queue:
+            if self._policy == DROP_NEWEST:
+                self.dropped += 1
+                return
+            if self._policy == COALESCE and self._coalesce(role, text):
+                self.coalesced += 1
+                return
+            self._queue.popleft()
+            self.dropped += 1
+
+        self._queue.append({"role": role, "text": text})
+        self._ensure_flusher()
+
+    def _coalesce(self, role, text) -> bool:
+        # Scan back from the newest event; merging keeps order for that role intact
+        for event in reversed(self._queue):
+            if event["role"] == role:
+                event["text"] = f"{event['text']} {text}"
+                return True
+        return False
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+        self._wakeup.set()
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._closing:
+                # Let a flush interval's worth of events pile up into one request
+                await asyncio.sleep(self._flush_interval_s)
+            await self._drain()
+            if self._closing:
+                return
+
+    async def _drain(self):
+        while self._queue:
+            await self._flush_once()
+
+    async def _flush_once(self):
+        batch = [self._queue.popleft() for _ in range(min(self._max_batch, len(self._queue)))]
+        try:
+            status = await self._http_pool.post_json(self._path, {"events": batch})
+        except asyncio.CancelledError:
+            # Not sent: back to the front, so close() accounts for it
+            self._queue.extendleft(reversed(batch))
+            raise
+        if status == 200:
+            self.sent += len(batch)
+        else:
+            self.failed += len(batch)
+
+    async def close(self, timeout_s: float = 3.0):
+        """
+        Stops accepting events and lets the flusher send what is queued (the last
+        transcript lines at hang-up), waiting up to `timeout_s`. Events still unsent
+        then count as failed.
+        """
+        self._closing = True
+        if self._flusher and not self._flusher.done():
+            drain = self._flusher
+            self._wakeup.set()
+        else:
+            drain = asyncio.get_running_loop().create_task(self._drain())
+        try:
+            await asyncio.wait_for(asyncio.shield(drain), timeout_s)
+        except asyncio.TimeoutError:
+            drain.cancel()
+            await asyncio.gather(drain, return_exceptions=True)
+        if self._queue:
+            self.failed += len(self._queue)
+            self._queue.clear()
+        logger.debug(
+            f"TelemetryQueue closed: sent={self.sent} failed={self.failed} "
+            f"dropped={self.dropped} coalesced={self.coalesced}"
+        )
@@ -0,0 +1,67 @@
+import re
+from typing import Optional
+
+SAFE = "SAFE"
+ATTACK = "ATTACK"
+
+_NUMBER = r"(?:\d+|zero|oh|one|two|three|four|five|six|seven|eight|nine|ten|star|pound|hash|\*|#)"
+_KEY_VERB = r"(?:press|push|dial|enter|select|choose|hit|say|type)"
+
+# Anything touching the agent's instructions, identity or authority goes to the model
+_RISK_TERMS = re.compile(
+    r"\b(?:ignore|disregard|forget|override|bypass|instruction|instructions|prompt|system|"
+    r"pretend|roleplay|role play|act as|you are now|from now on|developer mode|jailbreak|"
+    r"reveal|repeat after|your rules|your model|which model|what model|boss|manager|supervisor|"
+    r"admin|administrator|fired|emergency|priority|urgent|immediately|authorized|authorised|"
+    r"confidential|secret|password|token|api key)\b"
+)
+
+# A few words of free text: a menu option's description or a company name
+_FEW_WORDS = r"[a-z']+(?: [a-z']+){{0,{}}}"
+_HOLD = r"(?:(?:please )?(?:hold|stay on the line|wait)(?: a moment| one moment)?(?: please)?|one moment(?: please)?)"
+
+# Normalized text that is obviously harmless, in closed forms only: keypresses,
+# digits, IVR menu prompts, fixed hold messages, greetings of a few words and
+# one-word replies. Anything with an open-ended tail goes to the remote tier.
+_SAFE_PATTERNS = re.compile(
+    "|".join(
+        [
+            rf"[\d\s#*]+",
+            rf"(?:please )?{_KEY_VERB}(?: the)?(?: number| key| digit)? {_NUMBER}(?: {_NUMBER})*(?: please| now)?",
+            rf"(?:(?:please )?(?:for|to|if) {_FEW_WORDS.format(7)} (?:please )?{_KEY_VERB}(?: the number)? {_NUMBER} ?)+"
+            rf"(?:(?:or )?(?:to|for) (?:return|repeat|hear)(?: [a-z]+){{0,4}} {_KEY_VERB} {_NUMBER} ?)?",
+            r"(?:yes|yeah|yep|no|nope|okay|ok|sure|thanks|thank you|hello|hi|goodbye|bye|"
+            r"operator|representative|agent|main menu|repeat|billing|sales|support)(?: please)?",
+            _HOLD,
+            rf"your call is (?:very )?important to us(?: {_HOLD})?",
+            rf"(?:thank you for calling|welcome to) {_FEW_WORDS.format(3)}",
+        ]
+    )
+)
+
+_NON_WORD = re.compile(r"[^a-z0-9#*' ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, punctuation to spaces, whitespace collapsed (cache key and match input)."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def has_risk_terms(normalized: str) -> bool:
+    return _RISK_TERMS.search(normalized) is not None
+
+
+def classify_local(normalized: str) -> Optional[str]:
+    """
+    First-tier verdict for already-normalized text: SAFE when it is clearly harmless,
+    None when it is ambiguous and needs the remote classifier. Never returns ATTACK on
+    its own; risky wording only forces escalation.
+    """
+    if not normalized:
+        return SAFE
+    if _RISK_TERMS.search(normalized):
+        return None
+    if _SAFE_PATTERNS.fullmatch(normalized):
+        return SAFE
+    return None
@@ -0,0 +1,243 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import EndFrame, InputAudioRawFrame
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineTask
+from pipecat.transports.base_input import BaseInputTransport
+
+from src.agent.metrics.histogram import LatencyHistogram
+from src.agent.metrics.loop_lag import LoopLagMonitor
+from src.agent.net.http_pool import HTTPPool
+
+
+class SessionRejected(Exception):
+    """Raised by SessionManager.start() when a call is not admitted."""
+
+
+@dataclass
+class CallSession:
+    id: str
+    options: dict = field(default_factory=dict)
+    task: Optional[PipelineTask] = None
+    started_at: float = 0.0
+    ended_at: Optional[float] = None
+    error: Optional[BaseException] = None
+    _runner: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    async def wait(self):
+        """Returns once the session's pipeline has finished."""
+        if self._runner:
+            await asyncio.shield(self._runner)
+
+
+class FrameCounter(BaseObserver):
+    """Frames pushed across all sessions' pipelines, and audio frames entering from transports."""
+
+    def __init__(self):
+        super().__init__()
+        self.frames = 0
+        self.audio_frames_in = 0
+
+    async def on_push_frame(self, data: FramePushed):
+        self.frames += 1
+        if isinstance(data.frame, InputAudioRawFrame) and isinstance(data.source, BaseInputTransport):
+            self.audio_frames_in += 1
+
+
+# build(session) -> the session's PipelineTask; runs on the manager's loop
+SessionBuilder = Callable[[CallSession], Awaitable[PipelineTask]]
+# admit(session_id, options, manager) -> whether this call may start
+AdmissionPolicy = Callable[[str, dict, "SessionManager"], bool]
+
+
+class SessionManager:
+    """
+    Runs many calls, each its own PipelineTask, concurrently on one event loop.
+
+    `build` creates a session's pipeline (its own context, AEC state, tool session
+    and transport); whatever it closes over is shared by all sessions, e.g. one
+    HTTPPool (see agent_builder). Admission, in order:
+
+    1. `admit(session_id, options, manager)`, if given, can refuse a call outright.
+    2. New calls are refused while event-loop lag is above `max_loop_lag_ms`: the
+       sessions already running would pay for one more.
+    3. At most `max_sessions` run at once. Up to `max_queued` more wait up to
+       `queue_timeout_s` for a slot; beyond that calls are refused.
+
+    Refusals raise SessionRejected. A session ends when its pipeline ends (EndFrame
+    from inside, stop(), or an error); its slot is then released.
+    """
+
+    def __init__(
+        self,
+        build: SessionBuilder,
+        max_sessions: int = 8,
+        max_queued: int = 0,
+        queue_timeout_s: float = 5.0,
+        max_loop_lag_ms: Optional[float] = None,
+        admit: Optional[AdmissionPolicy] = None,
+    ):
+        self._build = build
+        self.max_sessions = max_sessions
+        self.max_queued = max_queued
+        self.queue_timeout_s = queue_timeout_s
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self._admit = admit
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._queued = 0
+        self._ids = itertools.count(1)
+        self.sessions: Dict[str, CallSession] = {}
+        self.loop_lag = LoopLagMonitor()
+        self.frame_counter = FrameCounter()
+
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.rejected = {"policy": 0, "loop_lag": 0, "capacity": 0, "timeout": 0}
+        self.queue_wait = LatencyHistogram()
+        self.setup = LatencyHistogram()  # admission -> pipeline running
+
+    @property
+    def active(self) -> int:
+        return len(self.sessions)
+
+    async def start(self, session_id: Optional[str] = None, **options) -> CallSession:
+        """Admits and starts one call. Options are passed to `build` via session.options."""
+        self.loop_lag.start()
+        session_id = session_id or f"call-{next(self._ids)}"
+        if session_id in self.sessions:
+            raise ValueError(f"Session {session_id} is already running")
+
+        if self._admit and not self._admit(session_id, options, self):
+            self._reject(session_id, "policy")
+        if self.max_loop_lag_ms is not None and self.loop_lag.current_ms > self.max_loop_lag_ms:
+            self._reject(session_id, "loop_lag")
+        await self._acquire_slot(session_id)
+
+        session = CallSession(id=session_id, options=options, started_at=time.monotonic())
+        self.sessions[session_id] = session
+        try:
+            session.task = await self._build(session)
+            session.task.add_observer(self.frame_counter)
+        except BaseException:
+            del self.sessions[session_id]
+            self._slots.release()
+            self.failed += 1
+            raise
+        session._runner = asyncio.get_running_loop().create_task(self._run(session))
+        self.started += 1
+        self.setup.record((time.monotonic() - session.started_at) * 1000)
+        logger.info(f"SessionManager: started {session_id} ({self.active}/{self.max_sessions} active)")
+        return session
+
+    async def _acquire_slot(self, session_id: str):
+        if not self._slots.locked():
+            await self._slots.acquire()
+            self.queue_wait.record(0.0)
+            return
+        if self._queued >= self.max_queued:
+            self._reject(session_id, "capacity")
+        self._queued += 1
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self._reject(session_id, "timeout")
+        finally:
+            self._queued -= 1
+        self.queue_wait.record((time.monotonic() - queued_at) * 1000)
+
+    def _reject(self, session_id: str, reason: str):
+        self.rejected[reason] += 1
+        logger.warning(f"SessionManager: rejected {session_id} ({reason}, {self.active} active)")
+        raise SessionRejected(f"{session_id}: {reason}")
+
+    async def _run(self, session: CallSession):
+        try:
+            # One runner per call; signals are the process owner's business
+            await PipelineRunner(handle_sigint=False).run(session.task)
+        except Exception as e:
+            session.error = e
+            self.failed += 1
+            logger.error(f"SessionManager: {session.id} failed: {e!r}")
+        finally:
+            session.ended_at = time.monotonic()
+            self.sessions.pop(session.id, None)
+            self._slots.release()
+            self.finished += 1
+            logger.info(
+                f"SessionManager: {session.id} ended after {session.ended_at - session.started_at:.1f}s "
+                f"({self.active} active)"
+            )
+
+    async def stop(self, session_id: str):
+        """Ends one call gracefully (EndFrame) and waits for its pipeline to finish."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        await session.task.queue_frame(EndFrame())
+        await session.wait()
+
+    async def stop_all(self):
+        await asyncio.gather(*(self.stop(session_id) for session_id in list(self.sessions)))
+        await self.loop_lag.stop()
+
+    async def wait_all(self):
+        """Returns once every running session has ended."""
+        while self.sessions:
+            await asyncio.gather(*(s.wait() for s in list(self.sessions.values())), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self._queued,
+            "started": self.started,
+            "finished": self.finished,
+            "failed": self.failed,
+            "rejected": dict(self.rejected),
+            "frames": self.frame_counter.frames,
+            "audio_frames_in": self.frame_counter.audio_frames_in,
+            "queue_wait": self.queue_wait.summary(),
+            "setup": self.setup.summary(),
+            "loop_lag": self.loop_lag.histogram.summary(),
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"SessionManager: {s['started']} started, {s['finished']} finished, {s['failed']} failed, "
+            f"rejected {s['rejected']}; setup p95 {s['setup']['p95_ms']:g} ms, "
+            f"loop lag p95 {s['loop_lag']['p95_ms']:g} / max {s['loop_lag']['max_ms']:.0f} ms"
+        )
+
+
+def agent_builder(transport_factory: Optional[Callable] = None, http_pool: Optional[HTTPPool] = None, **agent_options) -> SessionBuilder:
+    """
+    SessionBuilder for the IVR agent. Every session shares `http_pool` (one keep-alive
+    connection pool for tools and telemetry) and the module-level prompts and tool
+    schemas; context, AEC, tool session and transport are per call.
+    `transport_factory(session, vad_analyzer=...)` creates the call's transport (or pass
+    audio_in_file/audio_out_file as options for file replay). Per-session options
+    override `agent_options`.
+    """
+    from src.agent.factory import create_react_agent
+
+    async def build(session: CallSession) -> PipelineTask:
+        options = {**agent_options, **session.options}
+        if transport_factory:
+            options["transport_factory"] = lambda **kwargs: transport_factory(session, **kwargs)
+        _, task = await create_react_agent(http_pool=http_pool, **options)
+        return task
+
+    return build
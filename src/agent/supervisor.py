@@ -0,0 +1,372 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Set
+
+from loguru import logger
+
+from src.agent.sessions import SessionManager, SessionRejected, SessionBuilder
+
+# Worker processes are spawned, not forked: the parent already runs an event loop,
+# and a fresh interpreter behaves the same on Linux and macOS.
+_mp = multiprocessing.get_context("spawn")
+
+
+def run_worker_process(worker_id: int, conn, make_builder: Callable[[], SessionBuilder], manager_options: dict, report_interval_s: float):
+    """Runs one shard: a SessionManager on its own event loop, driven over `conn`."""
+    asyncio.run(_worker_loop(worker_id, conn, make_builder, manager_options, report_interval_s))
+
+
+async def _worker_loop(worker_id, conn, make_builder, manager_options, report_interval_s):
+    loop = asyncio.get_running_loop()
+    manager = SessionManager(make_builder(), **manager_options)
+    manager.loop_lag.start()
+    inbox: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+    starting: Set[str] = set()
+    stop_requested: Set[str] = set()  # stops that arrived while the call was starting
+
+    def on_readable():
+        try:
+            inbox.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            # Supervisor is gone
+            loop.remove_reader(conn.fileno())
+            inbox.put_nowait(("shutdown",))
+
+    def send(*message):
+        try:
+            conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def spawn(coro):
+        task = loop.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def start(session_id, options):
+        starting.add(session_id)
+        try:
+            session = await manager.start(session_id, **options)
+        except SessionRejected as e:
+            send("rejected", session_id, str(e))
+            return
+        except Exception as e:
+            logger.exception(f"Worker {worker_id}: {session_id} failed to start")
+            send("rejected", session_id, f"{session_id}: {e!r}")
+            return
+        finally:
+            starting.discard(session_id)
+        if session_id in stop_requested:
+            # The supervisor gave up waiting and may have placed the call elsewhere
+            stop_requested.discard(session_id)
+            logger.warning(f"Worker {worker_id}: {session_id} was stopped while starting")
+            # Never reported as started, so no "ended" either: the id may be running elsewhere
+            await manager.stop(session_id)
+            return
+        send("started", session_id)
+        await session.wait()
+        send("ended", session_id, repr(session.error) if session.error else None)
+
+    async def report():
+        last_frames, last_audio, last_at = 0, 0, time.monotonic()
+        while True:
+            await asyncio.sleep(report_interval_s)
+            s = manager.stats()
+            now = time.monotonic()
+            elapsed = now - last_at
+            send("metrics", {
+                "active": s["active"],
+                "queued": s["queued"],
+                "started": s["started"],
+                "finished": s["finished"],
+                "failed": s["failed"],
+                "rejected": sum(s["rejected"].values()),
+                "loop_lag_ms": manager.loop_lag.current_ms,
+                "loop_lag_p95_ms": s["loop_lag"]["p95_ms"],
+                "loop_lag_max_ms": s["loop_lag"]["max_ms"],
+                "frames_per_s": (s["frames"] - last_frames) / elapsed,
+                "audio_frames_per_s": (s["audio_frames_in"] - last_audio) / elapsed,
+            })
+            last_frames, last_audio, last_at = s["frames"], s["audio_frames_in"], now
+
+    loop.add_reader(conn.fileno(), on_readable)
+    reporter = loop.create_task(report())
+    send("ready", os.getpid())
+    while True:
+        message = await inbox.get()
+        kind = message[0]
+        if kind == "start":
+            spawn(start(message[1], message[2]))
+        elif kind == "stop":
+            if message[1] in starting:
+                stop_requested.add(message[1])
+            else:
+                spawn(manager.stop(message[1]))
+        elif kind == "shutdown":
+            break
+
+    reporter.cancel()
+    await manager.stop_all()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    loop.remove_reader(conn.fileno())
+    conn.close()
+
+
+@dataclass
+class WorkerState:
+    worker_id: int
+    process: Optional[multiprocessing.Process] = None
+    conn: Optional[object] = None
+    pid: Optional[int] = None
+    ready: bool = False
+    sessions: Set[str] = field(default_factory=set)
+    pending: Dict[str, asyncio.Future] = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+    restarts: int = 0
+    lost_sessions: int = 0
+
+    @property
+    def load(self) -> int:
+        return len(self.sessions) + len(self.pending)
+
+
+class ShardSupervisor:
+    """
+    Spreads calls over worker processes, one event loop (and core) each.
+
+    Audio DSP (AEC, VAD, resampling) is CPU-bound Python on the loop that also runs
+    the network clients, so in one process a busy call adds jitter to every other
+    call. Each worker here runs its own SessionManager, built from
+    `make_builder()` (a module-level, picklable callable returning a SessionBuilder);
+    `manager_options` go to every worker's SessionManager.
+
+    New calls go to the least-loaded live worker (running + pending calls, then
+    current loop lag); if it refuses, the next one is tried. Workers report metrics
+    (active sessions, loop lag, frames/s) every `report_interval_s` over their pipe.
+    A worker that dies is restarted (up to `max_restarts` times); its calls are
+    lost, the other workers keep running.
+    """
+
+    def __init__(
+        self,
+        make_builder: Callable[[], SessionBuilder],
+        workers: Optional[int] = None,
+        manager_options: Optional[dict] = None,
+        report_interval_s: float = 1.0,
+        start_timeout_s: float = 30.0,
+        max_restarts: int = 5,
+    ):
+        self._make_builder = make_builder
+        self.num_workers = workers or os.cpu_count() or 1
+        self.manager_options = manager_options or {}
+        self.report_interval_s = report_interval_s
+        self.start_timeout_s = start_timeout_s
+        self.max_restarts = max_restarts
+        self.workers: Dict[int, WorkerState] = {}
+        self._routes: Dict[str, int] = {}  # session id -> worker id
+        self._ids = itertools.count(1)
+        self._ready: Dict[int, asyncio.Future] = {}
+        self._stopping = False
+
+        self.crashes = 0
+        self.assigned = 0
+        self.rejected = 0
+
+    async def start(self):
+        """Spawns all workers and waits until each is ready for calls."""
+        for worker_id in range(self.num_workers):
+            self.workers[worker_id] = WorkerState(worker_id)
+            self._spawn(self.workers[worker_id])
+        await asyncio.gather(*self._ready.values())
+        logger.info(f"ShardSupervisor: {self.num_workers} workers ready")
+
+    def _spawn(self, worker: WorkerState):
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = _mp.Pipe()
+        process = _mp.Process(
+            target=run_worker_process,
+            args=(worker.worker_id, child_conn, self._make_builder, self.manager_options, self.report_interval_s),
+            name=f"call-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn, worker.pid, worker.ready = process, parent_conn, process.pid, False
+        worker.metrics = {}
+        ready = self._ready.get(worker.worker_id)
+        if ready is None or ready.done():
+            self._ready[worker.worker_id] = loop.create_future()
+        loop.add_reader(parent_conn.fileno(), self._on_message, worker)
+        loop.add_reader(process.sentinel, self._on_exit, worker)
+
+    def _on_message(self, worker: WorkerState):
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            # The sentinel reports the exit; stop polling a dead pipe
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+            return
+        kind = message[0]
+        if kind == "ready":
+            worker.ready = True
+            ready = self._ready.get(worker.worker_id)
+            if ready and not ready.done():
+                ready.set_result(None)
+        elif kind == "metrics":
+            worker.metrics = {**message[1], "updated_at": time.monotonic()}
+        elif kind in ("started", "rejected"):
+            future = worker.pending.pop(message[1], None)
+            if future is None:
+                # Answer to a start that already timed out; the worker was told to stop it
+                logger.warning(f"ShardSupervisor: late '{kind}' for {message[1]} from worker {worker.worker_id}")
+                return
+            if kind == "started":
+                worker.sessions.add(message[1])
+            if not future.done():
+                future.set_result(message)
+        elif kind == "ended":
+            worker.sessions.discard(message[1])
+            # Only this worker's copy; a start that timed out here may be running elsewhere
+            if self._routes.get(message[1]) == worker.worker_id:
+                del self._routes[message[1]]
+            if message[2]:
+                logger.warning(f"ShardSupervisor: {message[1]} on worker {worker.worker_id} failed: {message[2]}")
+
+    def _on_exit(self, worker: WorkerState):
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(worker.process.sentinel)
+        try:
+            loop.remove_reader(worker.conn.fileno())
+        except (ValueError, OSError):
+            pass
+        worker.conn.close()
+        worker.process.join(1)
+        worker.ready = False
+        if self._stopping:
+            return
+
+        self.crashes += 1
+        lost = set(worker.sessions) | set(worker.pending)
+        worker.lost_sessions += len(lost)
+        for session_id in lost:
+            self._routes.pop(session_id, None)
+        for session_id, future in worker.pending.items():
+            if not future.done():
+                future.set_result(("rejected", session_id, f"{session_id}: worker crashed"))
+        worker.sessions.clear()
+        worker.pending.clear()
+        logger.error(
+            f"ShardSupervisor: worker {worker.worker_id} (pid {worker.pid}) exited with "
+            f"{worker.process.exitcode}, {len(lost)} calls lost"
+        )
+        if worker.restarts >= self.max_restarts:
+            logger.error(f"ShardSupervisor: worker {worker.worker_id} restarted too often, leaving it down")
+            ready = self._ready.get(worker.worker_id)
+            if ready and not ready.done():
+                ready.set_exception(RuntimeError(f"worker {worker.worker_id} keeps exiting"))
+            return
+        worker.restarts += 1
+        self._spawn(worker)
+
+    def _candidates(self):
+        live = [w for w in self.workers.values() if w.ready]
+        return sorted(live, key=lambda w: (w.load, w.metrics.get("loop_lag_ms", 0.0)))
+
+    async def start_session(self, session_id: Optional[str] = None, **options) -> int:
+        """
+        Starts a call on the least-loaded worker and returns that worker's id. Options
+        reach the worker's SessionBuilder as session.options, so they must pickle.
+        Raises SessionRejected if no worker admits it.
+        """
+        session_id = session_id or f"call-{next(self._ids)}"
+        if session_id in self._routes:
+            raise ValueError(f"Session {session_id} is already running")
+        reasons = []
+        for worker in self._candidates():
+            future = asyncio.get_running_loop().create_future()
+            worker.pending[session_id] = future
+            try:
+                worker.conn.send(("start", session_id, options))
+            except (BrokenPipeError, OSError):
+                worker.pending.pop(session_id, None)
+                continue
+            try:
+                kind, _, *detail = await asyncio.wait_for(asyncio.shield(future), self.start_timeout_s)
+            except asyncio.TimeoutError:
+                worker.pending.pop(session_id, None)
+                reasons.append(f"worker {worker.worker_id}: start timed out")
+                # It may still start there; the next worker would then run it twice
+                self._send(worker, "stop", session_id)
+                continue
+            if kind == "started":
+                self._routes[session_id] = worker.worker_id
+                self.assigned += 1
+                return worker.worker_id
+            reasons.append(f"worker {worker.worker_id}: {detail[0]}")
+        self.rejected += 1
+        raise SessionRejected(f"{session_id}: no worker admitted it ({'; '.join(reasons) or 'no live workers'})")
+
+    async def stop_session(self, session_id: str):
+        """Asks the call's worker to end it gracefully; returns without waiting."""
+        worker_id = self._routes.get(session_id)
+        worker = self.workers.get(worker_id)
+        if worker is None or not worker.ready:
+            return
+        self._send(worker, "stop", session_id)
+
+    def _send(self, worker: WorkerState, *message):
+        try:
+            worker.conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    async def shutdown(self, timeout_s: float = 10.0):
+        """Ends every call and stops the workers (terminating any that hang)."""
+        self._stopping = True
+        for worker in self.workers.values():
+            if worker.ready:
+                try:
+                    worker.conn.send(("shutdown",))
+                except (BrokenPipeError, OSError):
+                    pass
+        deadline = time.monotonic() + timeout_s
+        for worker in self.workers.values():
+            while worker.process.is_alive() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.process.join(1)
+        logger.info("ShardSupervisor: all workers stopped")
+
+    def stats(self) -> dict:
+        return {
+            "assigned": self.assigned,
+            "rejected": self.rejected,
+            "crashes": self.crashes,
+            "workers": {
+                w.worker_id: {
+                    "pid": w.pid,
+                    "alive": w.ready,
+                    "sessions": len(w.sessions),
+                    "restarts": w.restarts,
+                    "lost_sessions": w.lost_sessions,
+                    **w.metrics,
+                }
+                for w in self.workers.values()
+            },
+        }
+
+    def log_stats(self):
+        for worker_id, w in self.stats()["workers"].items():
+            logger.info(
+                f"Worker {worker_id} (pid {w['pid']}): {w['sessions']} calls, "
+                f"lag {w.get('loop_lag_ms', 0):.1f} ms (p95 {w.get('loop_lag_p95_ms', 0):g}), "
+                f"{w.get('frames_per_s', 0):.0f} frames/s, {w.get('audio_frames_per_s', 0):.0f} audio in/s, "
+                f"{w['restarts']} restarts"
+            )
@@ -0,0 +1,181 @@
+import asyncio
+import dataclasses
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from src.agent.metrics.histogram import LatencyHistogram
+
+ToolHandler = Callable[[Any], Awaitable[Any]]
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ToolUnavailableError(Exception):
+    """Raised by a tool when its backend can't be reached; counts against the breaker."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; calls are then rejected
+    without trying until `reset_timeout_s` has passed, after which one trial call
+    is let through (half-open) and its outcome closes or re-opens the circuit.
+    Other calls are rejected while the trial is in flight.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_s: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+        return self.state != OPEN
+
+    def end_trial(self):
+        """The trial call ended without a verdict (e.g. cancelled); the next call may try."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._trial_in_flight = False
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"CircuitBreaker: opening after {self._failures} failures")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+
+@dataclasses.dataclass
+class ToolStats:
+    latency: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+    ok: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    rejected: int = 0  # circuit open
+
+
+class ToolExecutor:
+    """
+    Wraps LLM tool handlers with a timeout, a per-tool circuit breaker and latency
+    histograms, and delivers their return value through `result_callback`.
+
+    pipecat already runs the calls of one LLM response as concurrent tasks; the
+    wrapper keeps that, except for tools registered `serial=True` (e.g. keypresses,
+    whose order matters), which queue behind each other. `fire_and_forget=True`
+    tools answer `ack` at once and run in the background (e.g. `think`), so the LLM
+    doesn't wait on logging.
+    """
+
+    def __init__(self, default_timeout_s: float = 5.0, failure_threshold: int = 3, reset_timeout_s: float = 10.0):
+        self.default_timeout_s = default_timeout_s
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_s = reset_timeout_s
+        self.stats: Dict[str, ToolStats] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._background = set()
+
+    def register(
+        self,
+        llm,
+        name: str,
+        handler: ToolHandler,
+        timeout_s: Optional[float] = None,
+        serial: bool = False,
+        fire_and_forget: bool = False,
+        ack: str = "OK",
+    ):
+        self.stats[name] = ToolStats()
+        self.breakers[name] = CircuitBreaker(self._failure_threshold, self._reset_timeout_s)
+        timeout_s = timeout_s or self.default_timeout_s
+        lock = asyncio.Lock() if serial else None
+
+        async def run(params):
+            if fire_and_forget:
+                await params.result_callback(ack)
+                task = asyncio.create_task(self._invoke(name, handler, params, timeout_s, deliver=False))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            elif lock:
+                async with lock:
+                    await self._invoke(name, handler, params, timeout_s)
+            else:
+                await self._invoke(name, handler, params, timeout_s)
+
+        llm.register_function(name, run)
+
+    async def _invoke(self, name: str, handler: ToolHandler, params, timeout_s: float, deliver: bool = True):
+        stats = self.stats[name]
+        breaker = self.breakers[name]
+        if not breaker.allow():
+            stats.rejected += 1
+            if deliver:
+                await params.result_callback(f"{name} is temporarily unavailable, try again in a few seconds.")
+            return
+
+        trial = breaker.state == HALF_OPEN
+        delivered = False
+
+        async def result_callback(result, **kwargs):
+            nonlocal delivered
+            delivered = True
+            if deliver:
+                await params.result_callback(result, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                handler(dataclasses.replace(params, result_callback=result_callback)), timeout_s
+            )
+            breaker.record_success()
+            stats.ok += 1
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            stats.timeouts += 1
+            result = f"{name} timed out after {timeout_s:g}s."
+        except ToolUnavailableError as e:
+            breaker.record_failure()
+            stats.errors += 1
+            result = f"{name} failed: {e}"
+        except Exception as e:
+            logger.exception(f"ToolExecutor: {name} raised")
+            stats.errors += 1
+            result = f"{name} failed: {e}"
+        finally:
+            if trial:
+                breaker.end_trial()
+        stats.latency.record((time.perf_counter() - start) * 1000)
+
+        # Handlers written against the plain registry just return their result
+        if deliver and not delivered:
+            await params.result_callback(result)
+
+    def log_stats(self):
+        for name, s in self.stats.items():
+            if not s.latency.count:
+                continue
+            h = s.latency.summary()
+            logger.info(
+                f"Tool {name}: {h['count']} calls (ok {s.ok}, timeout {s.timeouts}, error {s.errors}, "
+                f"rejected {s.rejected}) p50 {h['p50_ms']:g} ms p95 {h['p95_ms']:g} ms max {h['max_ms']:.1f} ms "
+                f"[{s.latency.format_buckets()}] breaker {self.breakers[name].state}"
+            )
@@ -1,69 +1,201 @@
-import aiohttp
 import asyncio
-from typing import Optional
+import uuid
+from typing import Awaitable, Callable, Optional, Union
 
-async def press_digit(params):
+from pipecat.audio.dtmf.types import KeypadEntry
+from pipecat.frames.frames import OutputDTMFFrame
+
+from src.agent.net.http_pool import HTTPPool
+from src.agent.net.telemetry import TelemetryQueue
+from src.agent.tools.executor import ToolUnavailableError
+
+DTMF_DIGITS = "0123456789*#"
+DEFAULT_PRESS_GAP_MS = 300
+
+# on_complete(digits, completed) runs once the server has finished playing a sequence
+PressCallback = Callable[[str, bool], Union[None, Awaitable[None]]]
+_completion_tasks = set()
+
+
+class ToolSession:
     """
-    Presses digit(s) on the phone keypad.
-    
-    Args:
-        params: FunctionCallParams containing arguments.
+    Tool state for one call: the HTTP pool and telemetry queue the tools use and how
+    keypresses are sent. Several sessions can share one HTTPPool; each call gets its
+    own session so DTMF mode, press callbacks and UI thoughts don't leak across calls.
+
+    The module-level press_digit/think/press functions use a default session set up
+    by set_http_pool/set_telemetry/configure_dtmf.
     """
-    digits = params.arguments.get("digits")
-    # Backwards compatibility if model predicts 'digit'
-    if not digits:
-        digits = params.arguments.get("digit")
-        
-    print(f"DEBUG: Agent triggering press_digit(digits={digits})")
-    
-    if not digits:
-        return "No digits specified."
-
-    results = []
-    url = "http://localhost:8000/api/press"
-    
-    async with aiohttp.ClientSession() as session:
-        for char in str(digits):
-            if char not in "0123456789*#":
-                continue
-                
-            try:
-                # Add delay between presses for realism and to let UI update
-                if len(results) > 0:
-                    await asyncio.sleep(0.3)
-                    
-                async with session.post(url, json={"digit": char}) as response:
-                    if response.status == 200:
-                        results.append(char)
-                    else:
-                        print(f"Failed to press {char}. Status: {response.status}")
-            except Exception as e:
-                print(f"Failed to press {char}. Error: {e}")
-                
-    if results:
-        return f"Pressed: {''.join(results)}"
-    else:
-        return "Failed to press digits."
 
-async def think(params):
+    def __init__(
+        self,
+        http_pool: Optional[HTTPPool] = None,
+        telemetry: Optional[TelemetryQueue] = None,
+        gap_ms: int = DEFAULT_PRESS_GAP_MS,
+        on_complete: Optional[PressCallback] = None,
+        inband: bool = False,
+    ):
+        self.http_pool = http_pool
+        self.telemetry = telemetry
+        self.gap_ms = gap_ms
+        self.on_complete = on_complete
+        # Send tones through the audio path (DTMFGenerator) instead of the gym server
+        self.inband = inband
+
+    def _get_http_pool(self) -> HTTPPool:
+        if self.http_pool is None:
+            self.http_pool = HTTPPool()
+        return self.http_pool
+
+    def _get_telemetry(self) -> TelemetryQueue:
+        if self.telemetry is None:
+            self.telemetry = TelemetryQueue(self._get_http_pool())
+        return self.telemetry
+
+    async def press_digit(self, params):
+        """
+        Presses digit(s) on the phone keypad.
+
+        Args:
+            params: FunctionCallParams containing arguments.
+        """
+        digits = params.arguments.get("digits")
+        # Backwards compatibility if model predicts 'digit'
+        if not digits:
+            digits = params.arguments.get("digit")
+
+        print(f"DEBUG: Agent triggering press_digit(digits={digits})")
+
+        if not digits:
+            return "No digits specified."
+
+        pressed = await self.press(str(digits), params.llm)
+        if pressed:
+            return f"Pressed: {pressed}"
+        else:
+            return "Failed to press digits."
+
+    async def press(self, digits: str, processor=None) -> Optional[str]:
+        """
+        Presses `digits` the way this session is configured: in-band tones pushed
+        downstream of `processor` (the LLM, or any processor ahead of the DTMFGenerator),
+        or one request to the gym server. Returns the accepted digits, or None.
+        """
+        if self.inband:
+            return await press_inband(processor, digits)
+        return await self.press_sequence(digits)
+
+    async def press_sequence(
+        self,
+        digits: str,
+        gap_ms: Optional[int] = None,
+        on_complete: Optional[PressCallback] = None,
+    ) -> Optional[str]:
+        """
+        Sends the whole validated digit string to the gym server in one request; the
+        server spaces the presses `gap_ms` apart. Returns the accepted digits as soon as
+        the sequence is queued (not after playback), or None if nothing was accepted.
+        `on_complete` (default: the session's) is called in the background once
+        playback has finished. Raises ToolUnavailableError if the server can't be
+        reached, so the tool executor's circuit breaker sees the gym going down.
+        """
+        valid = "".join(char for char in digits if char in DTMF_DIGITS)
+        if not valid:
+            return None
+
+        gap_ms = self.gap_ms if gap_ms is None else gap_ms
+        sequence_id = uuid.uuid4().hex
+        pool = self._get_http_pool()
+        status = await pool.post_json(
+            "/api/press/sequence",
+            {"digits": valid, "gap_ms": gap_ms, "sequence_id": sequence_id},
+        )
+        if status is None:
+            raise ToolUnavailableError("gym server unreachable")
+        if status != 202:
+            print(f"Failed to press {valid}. Status: {status}")
+            return None
+
+        callback = on_complete or self.on_complete
+        if callback:
+            task = asyncio.create_task(self._await_sequence(sequence_id, valid, gap_ms, callback))
+            _completion_tasks.add(task)
+            task.add_done_callback(_completion_tasks.discard)
+        return valid
+
+    async def _await_sequence(self, sequence_id: str, digits: str, gap_ms: int, callback: PressCallback):
+        # Long poll; leave room for sequences queued ahead of this one
+        timeout_s = len(digits) * gap_ms / 1000 + 10.0
+        status = await self._get_http_pool().long_poll(
+            "/api/press/sequence/wait", {"sequence_id": sequence_id}, timeout_s=timeout_s
+        )
+        result = callback(digits, status == 200)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def think(self, params):
+        """
+        Logs a thought to the UI without speaking.
+        """
+        thought = params.arguments.get("thought")
+        if not thought:
+            return "Empty thought."
+
+        print(f"DEBUG: Agent thinking: {thought}")
+
+        # Batched to the UI server in the background
+        self._get_telemetry().emit("thought", thought)
+
+        return "Thought logged."
+
+
+# Used by the module-level functions; bound by create_react_agent for single-call runs.
+_default_session = ToolSession()
+
+def set_http_pool(pool: HTTPPool):
+    _default_session.http_pool = pool
+
+def set_telemetry(telemetry: TelemetryQueue):
+    _default_session.telemetry = telemetry
+
+def configure_dtmf(gap_ms: int = DEFAULT_PRESS_GAP_MS, on_complete: Optional[PressCallback] = None, inband: bool = False):
     """
-    Logs a thought to the UI without speaking.
+    Inter-digit gap the server should use, and an optional playback-finished callback for press_digit.
+    `inband=True` makes press_digit emit OutputDTMFFrames into the pipeline instead (needs a DTMFGenerator).
     """
-    thought = params.arguments.get("thought")
-    if not thought:
-        return "Empty thought."
-    
-    print(f"DEBUG: Agent thinking: {thought}")
-    
-    # Send thought to UI server
-    url = "http://localhost:8000/api/transcription"
-    async with aiohttp.ClientSession() as session:
-        try:
-            await session.post(url, json={"role": "thought", "text": thought})
-        except Exception:
-            pass
-            
-    return "Thought logged."
+    _default_session.gap_ms = gap_ms
+    _default_session.on_complete = on_complete
+    _default_session.inband = inband
+
+async def press_digit(params):
+    """Presses digit(s) on the phone keypad (default session)."""
+    return await _default_session.press_digit(params)
+
+async def press(digits: str, processor=None) -> Optional[str]:
+    """Presses `digits` through the default session; see ToolSession.press."""
+    return await _default_session.press(digits, processor)
+
+async def press_sequence(
+    digits: str,
+    gap_ms: Optional[int] = None,
+    on_complete: Optional[PressCallback] = None,
+) -> Optional[str]:
+    """Sends `digits` to the gym server through the default session; see ToolSession.press_sequence."""
+    return await _default_session.press_sequence(digits, gap_ms, on_complete)
+
+async def press_inband(processor, digits: str) -> Optional[str]:
+    """
+    Queues one OutputDTMFFrame per valid digit downstream of `processor`; DTMFGenerator
+    turns them into tones in front of transport.output(), in order with TTS audio.
+    """
+    valid = "".join(char for char in digits if char in DTMF_DIGITS)
+    for char in valid:
+        await processor.push_frame(OutputDTMFFrame(button=KeypadEntry(char)))
+    return valid or None
+
+async def think(params):
+    """Logs a thought to the UI without speaking (default session)."""
+    return await _default_session.think(params)
 
 tools = [
     {
@@ -1,11 +1,13 @@
 import numpy as np
-import scipy.signal
 from pipecat.frames.frames import AudioRawFrame, Frame
 from pipecat.processors.frame_processor import FrameProcessor
 from loguru import logger
 import collections
 
-from pipecat.frames.frames import AudioRawFrame, Frame, StartFrame, EndFrame, CancelFrame
+from src.agent.voice.ring_buffer import ReferenceRingBuffer, INT16_SCALE
+from src.agent.voice.nlms import FrequencyDomainNLMS
+from src.agent.voice.resampler import StreamingResampler
+from pipecat.frames.frames import AudioRawFrame, Frame, StartFrame, EndFrame, CancelFrame, InterruptionFrame
 
 class AECInputProcessor(FrameProcessor):
     def __init__(self, aec_manager: 'AECManager'):
@@ -26,9 +28,11 @@ class AECInputProcessor(FrameProcessor):
             if self._input_started:
                 # print("DEBUG: Input frame received")
                 clean_audio = self.manager.process_input(frame.audio, frame.num_channels, frame.sample_rate)
-                # Use current frame class to preserve type (InputAudioRawFrame vs OutputAudioRawFrame) and metadata capabilities
-                new_frame = frame.__class__(audio=clean_audio, sample_rate=frame.sample_rate, num_channels=frame.num_channels)
-                await self.push_frame(new_frame, direction)
+                # Same length, so swap the payload in place: keeps the frame's class, id and
+                # metadata, and skips building a new frame when audio passed through untouched
+                if clean_audio is not frame.audio:
+                    frame.audio = clean_audio
+                await self.push_frame(frame, direction)
         else:
             await self.push_frame(frame, direction)
 
@@ -47,49 +51,112 @@ class AECOutputProcessor(FrameProcessor):
             self._output_started = False
             await super().process_frame(frame, direction)
             await self.push_frame(frame, direction)
+        elif isinstance(frame, InterruptionFrame):
+            # The transport drops its queued audio; so must the echo reference
+            self.manager.interrupt()
+            await super().process_frame(frame, direction)
+            await self.push_frame(frame, direction)
         elif isinstance(frame, AudioRawFrame):
             if self._output_started:
                 # print("DEBUG: Output frame received")
-                self.manager.buffer_output(frame.audio)
+                self.manager.buffer_output(frame.audio, frame.sample_rate)
             # Pass output audio through
             await self.push_frame(frame, direction)
         else:
             await self.push_frame(frame, direction)
 
+# Selectable echo handling engines
+ENGINE_DUCKING = "ducking"  # mute the mic while the bot is (recently) speaking
+ENGINE_NLMS = "nlms"        # adaptive echo cancellation; mic stays open for barge-in
+ENGINES = (ENGINE_DUCKING, ENGINE_NLMS)
+
+# Q15 fixed point: gains are applied as (x * gain_q15) >> 15 on int16 samples
+Q15_ONE = 1 << 15
+
 class AECManager:
-    def __init__(self, sample_rate=16000, buffer_ms=400):
+    def __init__(self, sample_rate=16000, buffer_ms=400, reference_sample_rate=None, engine=ENGINE_DUCKING, duck_gain=0.0, **engine_kwargs):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown AEC engine '{engine}', expected one of {ENGINES}")
         self.sample_rate = sample_rate
-        # Keep ~400ms of reference audio
-        self.buffer_size = int(sample_rate * buffer_ms / 1000)
-        self.reference_buffer = np.zeros(self.buffer_size, dtype=np.float32)
+        self.engine = engine
+        # Keep ~400ms of reference audio. Sized in time, so a 44.1kHz output
+        # transport feeding a 16kHz mic path still covers the same window.
+        self.reference = ReferenceRingBuffer(reference_sample_rate or sample_rate, window_ms=buffer_ms)
+        self._hangover_counter = 0
+        self._nlms = FrequencyDomainNLMS(sample_rate=sample_rate, **engine_kwargs) if engine == ENGINE_NLMS else None
+        # Output (e.g. 44.1kHz) -> mic rate for the adaptive filter's reference, state kept across chunks
+        self._ref_resampler = None
+        # Attenuation while ducking; 0.0 mutes completely
+        self._duck_gain_q15 = int(round(min(max(duck_gain, 0.0), 1.0) * Q15_ONE))
+        # Mic time, and the mic time at which the output written so far finishes
+        # playing (TTS arrives in bursts, faster than real time). Once the mic is past
+        # that plus the window, the reference is stale (bot finished) even though
+        # nothing overwrote it
+        self._window_ms = buffer_ms
+        self._mic_ms = 0.0
+        self._playout_end_ms = 0.0
+        # Scratch reused across mic frames (resized only if the frame size changes)
+        self._scratch_samples = 0
         
-    def buffer_output(self, audio: bytes):
+    def buffer_output(self, audio: bytes, sample_rate: int = None):
         """Called when audio is about to be sent to speakers."""
-        # Convert bytes to float32
+        if sample_rate:
+            self.reference.ensure_rate(sample_rate)
         audio_int16 = np.frombuffer(audio, dtype=np.int16)
-        audio_float = audio_int16.astype(np.float32) / 32768.0
-        
-        # Roll buffer and add new data
-        # If new data is larger than buffer, take last part
-        if len(audio_float) >= self.buffer_size:
-            self.reference_buffer = audio_float[-self.buffer_size:]
-        else:
-            self.reference_buffer = np.roll(self.reference_buffer, -len(audio_float))
-            self.reference_buffer[-len(audio_float):] = audio_float
+        self.reference.write(audio_int16)
+        duration_ms = len(audio_int16) * 1000 / (sample_rate or self.reference.sample_rate)
+        self._playout_end_ms = max(self._playout_end_ms, self._mic_ms) + duration_ms
+
+        if self._nlms is not None:
+            # The adaptive filter needs the reference at the mic rate
+            ref = audio_int16.astype(np.float32) / 32768.0
+            rate = sample_rate or self.reference.sample_rate
+            if rate != self.sample_rate:
+                if self._ref_resampler is None or self._ref_resampler.in_rate != rate:
+                    self._ref_resampler = StreamingResampler(rate, self.sample_rate)
+                ref = self._ref_resampler.process(ref)
+            self._nlms.push_reference(ref)
+
+    def interrupt(self):
+        """Output was interrupted: reference audio queued but not yet played never will be."""
+        self._playout_end_ms = min(self._playout_end_ms, self._mic_ms)
+        if self._nlms is not None:
+            self._nlms.flush_reference()
+
+    def _ensure_scratch(self, num_samples: int):
+        if num_samples == self._scratch_samples:
+            return
+        self._scratch_samples = num_samples
+        self._scratch_bytes = bytearray(num_samples * 2)
+        self._scratch_int16 = np.frombuffer(self._scratch_bytes, dtype=np.int16)
+        self._scratch_int32 = np.empty(num_samples, dtype=np.int32)
+        self._scratch_float = np.empty(num_samples, dtype=np.float32)
 
     def process_input(self, audio: bytes, num_channels: int, sample_rate: int) -> bytes:
-        """Called when audio is received from mic. Performs echo subtraction via Ducking."""
-        if len(self.reference_buffer) == 0:
-             return audio
-             
-        # Convert input to float32
-        audio_int16 = np.frombuffer(audio, dtype=np.int16)
-        input_float = audio_int16.astype(np.float32) / 32768.0
+        """
+        Called when audio is received from mic. Performs echo subtraction via the selected engine.
+        Returns `audio` itself (no copy) when nothing needs to change. Processed audio is
+        computed in reusable scratch buffers; only the returned bytes are new, because the
+        frame carrying them outlives this call.
+        """
+        if self._nlms is not None:
+            audio_int16 = np.frombuffer(audio, dtype=np.int16)
+            self._ensure_scratch(len(audio_int16))
+            input_float = np.multiply(audio_int16, INT16_SCALE, out=self._scratch_float, dtype=np.float32)
+            clean_float = self._nlms.process(input_float)
+            np.clip(clean_float, -1.0, 32767 / 32768, out=clean_float)
+            np.multiply(clean_float, 32768.0, out=clean_float)
+            np.copyto(self._scratch_int16, clean_float, casting="unsafe")
+            return bytes(self._scratch_bytes)
         
         # Check Reference Energy (what the bot is saying)
-        # We look at the ENTIRE reference buffer (last ~400ms) to account for system latency.
+        # We look at the ENTIRE reference window (last ~400ms) to account for system latency.
         # If the bot sent loud audio recently, it's likely playing now or echoing.
-        ref_peak = np.max(np.abs(self.reference_buffer))
+        self._mic_ms += len(audio) * 500 / (sample_rate * num_channels)  # 2 bytes/sample
+        if self._mic_ms > self._playout_end_ms + self._window_ms:
+            ref_peak = 0.0
+        else:
+            ref_peak = self.reference.peak()
         
         # Threshold for "Bot is speaking"
         # 0.01 is ~327 amplitude (approx -40dB)
@@ -97,18 +164,44 @@ class AECManager:
         
         if is_bot_speaking:
             self._hangover_counter = 16 # Keep ducking for ~16 frames (320ms) after speech ends
-        elif hasattr(self, '_hangover_counter') and self._hangover_counter > 0:
+        elif self._hangover_counter > 0:
             self._hangover_counter -= 1
-        else:
-            self._hangover_counter = 0
 
-        if self._hangover_counter > 0:
-             # Apply COMPLETE attenuation (Mute)
-             # This prevents any echo leakage.
-             clean_float = np.zeros_like(input_float)
-        else:
-             clean_float = input_float
-             
-        # Convert back to bytes
-        clean_int16 = (clean_float * 32768.0).astype(np.int16)
-        return clean_int16.tobytes()
+        if self._hangover_counter == 0 or self._duck_gain_q15 >= Q15_ONE:
+            # Fast path: mic passes through untouched
+            return audio
+
+        if self._duck_gain_q15 == 0:
+            # Apply COMPLETE attenuation (Mute)
+            # This prevents any echo leakage.
+            return bytes(len(audio))
+
+        # Partial ducking in int16 fixed point, no float round trip
+        audio_int16 = np.frombuffer(audio, dtype=np.int16)
+        self._ensure_scratch(len(audio_int16))
+        np.multiply(audio_int16, self._duck_gain_q15, out=self._scratch_int32, dtype=np.int32)
+        np.right_shift(self._scratch_int32, 15, out=self._scratch_int32)
+        np.copyto(self._scratch_int16, self._scratch_int32, casting="unsafe")
+        return bytes(self._scratch_bytes)
+
+    def engine_stats(self) -> dict:
+        """CPU/delay figures for the adaptive engine (empty for ducking)."""
+        if self._nlms is None:
+            return {}
+        n = self._nlms
+        return {
+            "delay_ms": n.delay * 1000 / self.sample_rate,
+            "frames": n.frames,
+            "avg_frame_us": n.cpu_s / n.frames * 1e6 if n.frames else 0.0,
+            "max_frame_us": n.max_frame_s * 1e6,
+            "realtime_factor": n.realtime_factor,
+        }
+
+def create_aec_processors(engine=ENGINE_DUCKING, sample_rate=16000, **kwargs):
+    """
+    Builds the AEC processor pair around one shared AECManager.
+    Place the input processor right after transport.input() and the output
+    processor right before transport.output().
+    """
+    manager = AECManager(sample_rate=sample_rate, engine=engine, **kwargs)
+    return AECInputProcessor(manager), AECOutputProcessor(manager)
@@ -0,0 +1,284 @@
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+from loguru import logger
+from pipecat.audio.dtmf.types import KeypadEntry
+from pipecat.frames.frames import (
+    Frame,
+    InputAudioRawFrame,
+    InputDTMFFrame,
+    OutputAudioRawFrame,
+    OutputDTMFFrame,
+    OutputDTMFUrgentFrame,
+    StartFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+# Keypad layout: row (low group) and column (high group) frequencies in Hz
+DTMF_LOW_HZ = (697, 770, 852, 941)
+DTMF_HIGH_HZ = (1209, 1336, 1477, 1633)
+DTMF_KEYS = {
+    "1": (0, 0), "2": (0, 1), "3": (0, 2),
+    "4": (1, 0), "5": (1, 1), "6": (1, 2),
+    "7": (2, 0), "8": (2, 1), "9": (2, 2),
+    "*": (3, 0), "0": (3, 1), "#": (3, 2),
+}
+
+FADE_MS = 3  # raised-cosine edges so tones don't click
+
+
+@lru_cache(maxsize=16)
+def dtmf_tone_table(sample_rate: int, tone_ms: int = 100, gap_ms: int = 100, level_db: float = -10.0) -> Dict[str, bytes]:
+    """
+    16-bit PCM for every key at `sample_rate`: `tone_ms` of the two-tone pair (each
+    tone at `level_db` dBFS) followed by `gap_ms` of silence. All 12 keys are built in
+    one vectorized pass and cached per parameter set, so presses are a dict lookup.
+    """
+    n_tone = sample_rate * tone_ms // 1000
+    n_gap = sample_rate * gap_ms // 1000
+    t = np.arange(n_tone) / sample_rate
+
+    keys = list(DTMF_KEYS)
+    low = np.array([DTMF_LOW_HZ[DTMF_KEYS[k][0]] for k in keys], dtype=np.float64)
+    high = np.array([DTMF_HIGH_HZ[DTMF_KEYS[k][1]] for k in keys], dtype=np.float64)
+    tones = np.sin(2 * np.pi * low[:, None] * t) + np.sin(2 * np.pi * high[:, None] * t)
+
+    n_fade = min(n_tone // 2, sample_rate * FADE_MS // 1000)
+    if n_fade:
+        ramp = 0.5 * (1 - np.cos(np.pi * np.arange(n_fade) / n_fade))
+        tones[:, :n_fade] *= ramp
+        tones[:, n_tone - n_fade:] *= ramp[::-1]
+
+    amplitude = 32767 * 10 ** (level_db / 20)
+    pcm = np.zeros((len(keys), n_tone + n_gap), dtype=np.int16)
+    pcm[:, :n_tone] = np.clip(np.rint(tones * amplitude), -32768, 32767)
+    return {key: pcm[i].tobytes() for i, key in enumerate(keys)}
+
+
+def synthesize_dtmf(digits: str, sample_rate: int, tone_ms: int = 100, gap_ms: int = 100, level_db: float = -10.0) -> bytes:
+    """PCM for a digit string; characters outside 0-9, * and # are skipped."""
+    table = dtmf_tone_table(sample_rate, tone_ms, gap_ms, level_db)
+    return b"".join(table[d] for d in digits if d in table)
+
+
+class DTMFGenerator(FrameProcessor):
+    """
+    Turns OutputDTMFFrame / OutputDTMFUrgentFrame into in-band tone audio, so the
+    agent can key a real IVR over the audio path (no gym server).
+
+    Place it before the AEC output tap and transport.output(): the tones then go out
+    as ordinary OutputAudioRawFrames, land in the AEC reference like TTS audio, and
+    the mic path doesn't transcribe the agent's own keypresses. (Left to the
+    transport, DTMF audio would be written past the tap.)
+    """
+
+    def __init__(self, sample_rate: Optional[int] = None, tone_ms: int = 100, gap_ms: int = 100, level_db: float = -10.0, **kwargs):
+        super().__init__(**kwargs)
+        self._init_sample_rate = sample_rate
+        self._sample_rate = sample_rate or 16000
+        self._tone_ms = tone_ms
+        self._gap_ms = gap_ms
+        self._level_db = level_db
+        self.digits_sent = 0
+
+    async def process_frame(self, frame: Frame, direction):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, StartFrame):
+            self._sample_rate = self._init_sample_rate or frame.audio_out_sample_rate
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, (OutputDTMFFrame, OutputDTMFUrgentFrame)):
+            table = dtmf_tone_table(self._sample_rate, self._tone_ms, self._gap_ms, self._level_db)
+            audio = table.get(frame.button.value)
+            if audio is None:
+                await self.push_frame(frame, direction)
+                return
+            self.digits_sent += 1
+            out = OutputAudioRawFrame(audio=audio, sample_rate=self._sample_rate, num_channels=1)
+            out.transport_destination = frame.transport_destination
+            await self.push_frame(out, direction)
+        else:
+            await self.push_frame(frame, direction)
+
+
+class GoertzelDTMFDetector:
+    """
+    Block DTMF detector: a Goertzel bank over the 8 keypad frequencies.
+
+    Each block's 8 single-bin powers come from one matrix product against
+    precomputed cos/sin tables (the closed form of running 8 Goertzel filters),
+    and all complete blocks in a chunk are evaluated together. Blocks overlap
+    (`hop_ms` apart) so a 40 ms tone still spans two of them. A block holds a
+    key when the level is above `min_level_db`, the strongest row and column tones
+    each beat their group's runner-up by `peak_ratio`, the twist stays within
+    `max_twist_db` (column louder) / `max_reverse_twist_db` (row louder), and the
+    pair carries at least `min_tone_fraction` of the block energy (rejects speech).
+    A digit is reported once it holds for `min_blocks` consecutive blocks, and only
+    again after a gap.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        block_ms: float = 25.6,
+        hop_ms: float = 12.8,
+        min_level_db: float = -40.0,
+        peak_ratio: float = 4.0,
+        max_twist_db: float = 4.0,
+        max_reverse_twist_db: float = 8.0,
+        min_tone_fraction: float = 0.6,
+        min_blocks: int = 2,
+    ):
+        self.sample_rate = sample_rate
+        self.block = int(round(sample_rate * block_ms / 1000))
+        self.hop = int(round(sample_rate * hop_ms / 1000))
+        n = np.arange(self.block)[:, None]
+        freqs = np.array(DTMF_LOW_HZ + DTMF_HIGH_HZ, dtype=np.float64)
+        phase = 2 * np.pi * freqs[None, :] * n / sample_rate
+        # [block, 16]: cos for the 8 bins, then sin
+        self._basis = np.concatenate((np.cos(phase), np.sin(phase)), axis=1).astype(np.float32)
+
+        self._min_energy = (32768.0 ** 2) * 10 ** (min_level_db / 10)
+        self._peak_ratio = peak_ratio
+        self._max_twist = 10 ** (max_twist_db / 10)
+        self._max_reverse_twist = 10 ** (max_reverse_twist_db / 10)
+        self._min_tone_fraction = min_tone_fraction
+        self._min_blocks = min_blocks
+        self._keys = {rc: key for key, rc in DTMF_KEYS.items()}
+
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._candidate = None
+        self._run = 0
+        self._reported = False
+
+    def reset(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._candidate = None
+        self._run = 0
+        self._reported = False
+
+    def _classify_blocks(self, blocks: np.ndarray) -> list:
+        """Key (or None) for each row of `blocks` [count, block]."""
+        block_power = np.einsum("ij,ij->i", blocks, blocks) / self.block
+        loud = block_power >= self._min_energy
+        if not loud.any():
+            # Silence / quiet line: skip the filter bank
+            return [None] * len(blocks)
+
+        proj = blocks @ self._basis
+        # Sinusoid of amplitude A: |X|^2 = (A N / 2)^2 and its mean square is A^2 / 2
+        tone_power = (proj[:, :8] ** 2 + proj[:, 8:] ** 2) * (2.0 / (self.block ** 2))
+        low = np.sort(tone_power[:, :4], axis=1)
+        high = np.sort(tone_power[:, 4:], axis=1)
+        low_peak, high_peak = low[:, -1], high[:, -1]
+
+        ok = loud
+        ok &= low_peak >= self._peak_ratio * low[:, -2]
+        ok &= high_peak >= self._peak_ratio * high[:, -2]
+        ok &= high_peak <= self._max_twist * low_peak
+        ok &= low_peak <= self._max_reverse_twist * high_peak
+        ok &= (low_peak + high_peak) >= self._min_tone_fraction * block_power
+        if not ok.any():
+            return [None] * len(blocks)
+
+        row = tone_power[:, :4].argmax(axis=1)
+        col = tone_power[:, 4:].argmax(axis=1)
+        return [self._keys.get((r, c)) if hit else None for hit, r, c in zip(ok.tolist(), row.tolist(), col.tolist())]
+
+    def process(self, samples: np.ndarray):
+        """
+        Feeds int16/float samples. Returns (new digits, tone_present) where
+        tone_present says whether any block completed here looked like a key.
+        """
+        x = np.concatenate((self._carry, samples.astype(np.float32, copy=False)))
+        if len(x) < self.block:
+            self._carry = x
+            return [], False
+        count = (len(x) - self.block) // self.hop + 1
+        self._carry = x[count * self.hop:]
+        # Only a couple of blocks per frame: a contiguous stack beats a strided view here
+        blocks = np.stack([x[i * self.hop:i * self.hop + self.block] for i in range(count)])
+
+        digits = []
+        tone_present = False
+        for key in self._classify_blocks(blocks):
+            tone_present |= key is not None
+            if key is not None and key == self._candidate:
+                self._run += 1
+            else:
+                self._candidate = key
+                self._run = 1 if key is not None else 0
+                self._reported = False
+            if key is not None and not self._reported and self._run >= self._min_blocks:
+                digits.append(key)
+                self._reported = True
+        return digits, tone_present
+
+
+class DTMFDetectorProcessor(FrameProcessor):
+    """
+    Detects keypad tones on the mic path (far end / IVR confirmations) and pushes an
+    InputDTMFFrame per digit ahead of the audio that completed it.
+
+    Frames in which a block looked like a key, and `mute_hangover_frames` after, are
+    replaced with silence so Deepgram never sees tone audio (no garbage transcripts,
+    no STT time spent on beeps). Frames keep flowing, so VAD/STT timing is intact.
+    Detection needs a full block, so the first ~20 ms of a tone can slip through.
+    """
+
+    def __init__(self, mute_tones: bool = True, mute_hangover_frames: int = 2, **detector_kwargs):
+        super().__init__()
+        self._mute_tones = mute_tones
+        self._mute_hangover_frames = mute_hangover_frames
+        self._detector_kwargs = detector_kwargs
+        self._detector = None
+        self._mute_left = 0
+
+        self.frames = 0
+        self.muted_frames = 0
+        self.digits_detected = 0
+        self.cpu_s = 0.0
+
+    def _get_detector(self, sample_rate: int) -> GoertzelDTMFDetector:
+        if self._detector is None or self._detector.sample_rate != sample_rate:
+            self._detector = GoertzelDTMFDetector(sample_rate=sample_rate, **self._detector_kwargs)
+        return self._detector
+
+    async def process_frame(self, frame: Frame, direction):
+        await super().process_frame(frame, direction)
+
+        if not (isinstance(frame, InputAudioRawFrame) and direction == FrameDirection.DOWNSTREAM):
+            await self.push_frame(frame, direction)
+            return
+
+        start = time.perf_counter()
+        samples = np.frombuffer(frame.audio, dtype=np.int16)
+        if frame.num_channels > 1:
+            samples = samples[::frame.num_channels]
+        digits, tone_present = self._get_detector(frame.sample_rate).process(samples)
+        if tone_present:
+            self._mute_left = self._mute_hangover_frames + 1
+        muted = self._mute_tones and self._mute_left > 0
+        if self._mute_left:
+            self._mute_left -= 1
+        self.cpu_s += time.perf_counter() - start
+        self.frames += 1
+
+        for digit in digits:
+            self.digits_detected += 1
+            logger.debug(f"DTMF detected: {digit}")
+            await self.push_frame(InputDTMFFrame(button=KeypadEntry(digit)))
+        if muted:
+            self.muted_frames += 1
+            frame.audio = bytes(len(frame.audio))
+        await self.push_frame(frame, direction)
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "muted_frames": self.muted_frames,
+            "digits_detected": self.digits_detected,
+            "avg_frame_us": self.cpu_s / self.frames * 1e6 if self.frames else 0.0,
+        }
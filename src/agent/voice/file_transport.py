@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+import time
+import wave
+from typing import Optional
+
+import numpy as np
+
+from pipecat.frames.frames import InputAudioRawFrame, OutputAudioRawFrame, StartFrame, EndFrame, CancelFrame, EndTaskFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.transports.base_input import BaseInputTransport
+from pipecat.transports.base_output import BaseOutputTransport
+from pipecat.transports.base_transport import BaseTransport, TransportParams
+
+from src.agent.voice.resampler import StreamingResampler
+
+FRAME_MS = 20
+# Output that falls behind the input by less than this still plays back to back
+PLAYOUT_BUFFER_MS = 60
+
+
+def load_pcm(path: str, sample_rate: int, pcm_sample_rate: Optional[int] = None) -> bytes:
+    """
+    Reads a 16-bit WAV (any rate, mono or multi-channel) or headerless 16-bit mono PCM
+    at `pcm_sample_rate` (default `sample_rate`) and returns mono PCM at `sample_rate`.
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: need 16-bit PCM, got {wav.getsampwidth() * 8}-bit")
+            rate, channels = wav.getframerate(), wav.getnchannels()
+            pcm = wav.readframes(wav.getnframes())
+    else:
+        with open(path, "rb") as f:
+            pcm = f.read()
+        rate, channels = pcm_sample_rate or sample_rate, 1
+
+    samples = np.frombuffer(pcm[:len(pcm) // (2 * channels) * 2 * channels], dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    pcm = samples.tobytes()
+    if rate != sample_rate:
+        pcm = StreamingResampler(rate, sample_rate).process_int16(pcm)
+    return pcm
+
+
+class MediaClock:
+    """Seconds of input audio delivered so far; the timeline output timestamps refer to."""
+
+    def __init__(self):
+        self.position_s = 0.0
+
+
+class FileAudioInputTransport(BaseInputTransport):
+    """
+    Replays a recording as 20 ms InputAudioRawFrames at `speed` x real time (0: as
+    fast as the pipeline takes them), followed by `tail_s` of silence at real time so
+    replies to the last prompt can arrive. Then ends the pipeline if `end_on_eof`.
+    """
+
+    def __init__(self, params: TransportParams, path: str, clock: MediaClock, speed: float, tail_s: float, end_on_eof: bool):
+        super().__init__(params)
+        self._path = path
+        self._clock = clock
+        self._speed = speed
+        self._tail_s = tail_s
+        self._end_on_eof = end_on_eof
+        self._sample_rate = 0
+        self._reader = None
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        self._sample_rate = self._params.audio_in_sample_rate or frame.audio_in_sample_rate
+        if not self._reader:
+            self._reader = self.create_task(self._read())
+        await self.set_transport_ready(frame)
+
+    async def stop(self, frame: EndFrame):
+        await self._stop_reader()
+        await super().stop(frame)
+
+    async def cancel(self, frame: CancelFrame):
+        await self._stop_reader()
+        await super().cancel(frame)
+
+    async def _stop_reader(self):
+        if self._reader:
+            await self.cancel_task(self._reader)
+            self._reader = None
+
+    async def _read(self):
+        pcm = await asyncio.to_thread(load_pcm, self._path, self._sample_rate)
+        step = int(self._sample_rate * FRAME_MS / 1000) * 2
+        frame_s = FRAME_MS / 1000
+        recorded = len(pcm) // step
+        total = recorded + int(self._tail_s / frame_s)
+        silence = b"\x00" * step
+
+        start = time.monotonic()
+        due = 0.0
+        for i in range(total):
+            audio = pcm[i * step:(i + 1) * step] if i < recorded else silence
+            await self.push_audio_frame(InputAudioRawFrame(audio=audio, sample_rate=self._sample_rate, num_channels=1))
+            self._clock.position_s = (i + 1) * frame_s
+            speed = self._speed if i < recorded else 1.0
+            if speed > 0:
+                # Absolute schedule, so a late wakeup doesn't shift every later frame
+                due += frame_s / speed
+                await asyncio.sleep(max(0.0, start + due - time.monotonic()))
+            else:
+                start = time.monotonic()
+                await asyncio.sleep(0)
+
+        if self._end_on_eof:
+            await self.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
+
+
+class FileAudioOutputTransport(BaseOutputTransport):
+    """
+    Writes output audio to a WAV on the input's timeline: each chunk lands at the
+    current input position, or right after the previous chunk if that is still
+    "playing" or ended less than PLAYOUT_BUFFER_MS ago; silence fills the gaps.
+    Non-silent stretches are also listed in a JSONL sidecar as {"start_s", "end_s"}.
+    With `speed` > 0 writes take as long as playback would (at that speed), like a
+    sound card.
+    """
+
+    def __init__(self, params: TransportParams, path: Optional[str], clock: MediaClock, speed: float):
+        super().__init__(params)
+        self._path = path
+        self._clock = clock
+        self._speed = speed
+        self._wav: Optional[wave.Wave_write] = None
+        self._segments = None
+        self._cursor = 0  # samples written
+        self._segment_start: Optional[int] = None
+        self._segment_end = 0
+        self._play_due = 0.0  # monotonic time the audio written so far finishes playing
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        if self._path and not self._wav:
+            self._wav = wave.open(self._path, "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.sample_rate)
+            self._segments = open(os.path.splitext(self._path)[0] + ".jsonl", "w")
+        await self.set_transport_ready(frame)
+
+    async def stop(self, frame: EndFrame):
+        await super().stop(frame)
+        self._close()
+
+    async def cancel(self, frame: CancelFrame):
+        await super().cancel(frame)
+        self._close()
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame) -> bool:
+        samples = len(frame.audio) // 2
+        now = int(self._clock.position_s * self.sample_rate)
+        at = self._cursor if now - self._cursor <= PLAYOUT_BUFFER_MS * self.sample_rate // 1000 else now
+        if self._wav:
+            if at > self._cursor:
+                self._wav.writeframesraw(b"\x00" * (2 * (at - self._cursor)))
+            self._wav.writeframesraw(frame.audio)
+            if frame.audio.count(0) != len(frame.audio):
+                if self._segment_start is None or at > self._segment_end:
+                    self._end_segment()
+                    self._segment_start = at
+                self._segment_end = at + samples
+        self._cursor = at + samples
+        if self._speed > 0:
+            now_s = time.monotonic()
+            self._play_due = max(self._play_due, now_s) + samples / self.sample_rate / self._speed
+            await asyncio.sleep(self._play_due - now_s)
+        return True
+
+    def _end_segment(self):
+        if self._segment_start is not None and self._segments:
+            rate = self.sample_rate
+            self._segments.write(json.dumps({
+                "start_s": round(self._segment_start / rate, 3),
+                "end_s": round(self._segment_end / rate, 3),
+            }) + "\n")
+        self._segment_start = None
+
+    def _close(self):
+        if self._wav:
+            self._end_segment()
+            self._wav.close()
+            self._segments.close()
+            self._wav = self._segments = None
+
+
+class FileAudioTransport(BaseTransport):
+    """
+    Offline transport: replays a WAV/PCM recording as the caller and records the
+    agent to a WAV (plus a JSONL of when it spoke), for headless benchmarks and
+    batch regression runs. `speed` 1.0 is real time, 0 as fast as possible (output
+    timestamps then only say how far the replay had got when the agent spoke).
+    """
+
+    def __init__(
+        self,
+        params: TransportParams,
+        input_path: str,
+        output_path: Optional[str] = None,
+        speed: float = 1.0,
+        tail_s: float = 5.0,
+        end_on_eof: bool = True,
+    ):
+        super().__init__()
+        self._params = params
+        self._clock = MediaClock()
+        self._input_args = (input_path, self._clock, speed, tail_s, end_on_eof)
+        self._output_args = (output_path, self._clock, speed)
+        self._input: Optional[FileAudioInputTransport] = None
+        self._output: Optional[FileAudioOutputTransport] = None
+
+    def input(self) -> FrameProcessor:
+        if not self._input:
+            self._input = FileAudioInputTransport(self._params, *self._input_args)
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        if not self._output:
+            self._output = FileAudioOutputTransport(self._params, *self._output_args)
+        return self._output
@@ -0,0 +1,328 @@
+import time
+
+import numpy as np
+
+
+class _FloatRing:
+    """Fixed-size float32 history; `read` returns the n samples ending `offset` before the newest."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.buf = np.zeros(size, dtype=np.float32)
+        self.pos = 0
+
+    def write(self, x: np.ndarray):
+        n = len(x)
+        first = min(n, self.size - self.pos)
+        self.buf[self.pos:self.pos + first] = x[:first]
+        if first < n:
+            self.buf[:n - first] = x[first:]
+        self.pos = (self.pos + n) % self.size
+
+    def read(self, n: int, offset: int = 0, out: np.ndarray = None) -> np.ndarray:
+        if out is None:
+            out = np.empty(n, dtype=np.float32)
+        start = (self.pos - offset - n) % self.size
+        first = min(n, self.size - start)
+        out[:first] = self.buf[start:start + first]
+        if first < n:
+            out[first:n] = self.buf[:n - first]
+        return out
+
+
+class _ReferenceFifo:
+    """
+    Far-end samples waiting to be "played". Output frames arrive in bursts, often
+    much faster than real time (a whole TTS reply within a second); the mic side
+    drains this at its own (real-time) rate, which is what the speaker does. Starts
+    at `size` samples and grows (doubling) up to `max_size` rather than dropping
+    reference that is still to be played. Underruns read as silence; only beyond
+    `max_size` are the oldest samples dropped.
+    """
+
+    def __init__(self, size: int, max_size: int):
+        self.size = size
+        self.max_size = max(size, max_size)
+        self.buf = np.zeros(size, dtype=np.float32)
+        self.written = 0
+        self.read_count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.written - self.read_count
+
+    def push(self, x: np.ndarray):
+        if len(self) + len(x) > self.size:
+            self._grow(len(self) + len(x))
+        if len(x) > self.size:
+            self.dropped += len(x) - self.size
+            x = x[-self.size:]
+        self._copy_in(self.written, x)
+        self.written += len(x)
+        if len(self) > self.size:
+            self.dropped += len(self) - self.size
+            self.read_count = self.written - self.size
+
+    def pop(self, n: int, out: np.ndarray) -> np.ndarray:
+        avail = min(n, len(self))
+        self._copy_out(self.read_count, avail, out)
+        out[avail:n] = 0.0
+        self.read_count += avail
+        return out
+
+    def clear(self):
+        self.read_count = self.written
+
+    def _grow(self, needed: int):
+        size = self.size
+        while size < needed and size < self.max_size:
+            size *= 2
+        size = min(size, self.max_size)
+        if size == self.size:
+            return
+        pending = np.empty(len(self), dtype=np.float32)
+        self._copy_out(self.read_count, len(pending), pending)
+        self.size = size
+        self.buf = np.zeros(size, dtype=np.float32)
+        self._copy_in(self.read_count, pending)
+
+    def _copy_in(self, index: int, x: np.ndarray):
+        n = len(x)
+        pos = index % self.size
+        first = min(n, self.size - pos)
+        self.buf[pos:pos + first] = x[:first]
+        if first < n:
+            self.buf[:n - first] = x[first:]
+
+    def _copy_out(self, index: int, n: int, out: np.ndarray):
+        pos = index % self.size
+        first = min(n, self.size - pos)
+        out[:first] = self.buf[pos:pos + first]
+        if first < n:
+            out[first:n] = self.buf[:n - first]
+
+
+class FrequencyDomainNLMS:
+    """
+    Partitioned-block frequency-domain NLMS echo canceller (overlap-save), with
+
+    - bulk delay estimation (GCC-PHAT between the played reference and the mic),
+      so the adaptive filter only has to model the room tail, not device latency;
+    - a Geigel double-talk detector that freezes adaptation while the user speaks
+      over the bot, which is what keeps barge-in audio intact;
+    - a spectral residual echo suppressor driven by the filter's echo estimate.
+
+    Works on float32 mono at the mic rate in blocks of `block_size` samples. Frames
+    that are not a multiple of the block size are buffered (adding one block of
+    latency). Per-frame CPU time is accumulated in `cpu_s` / `realtime_factor`.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        block_size: int = 160,
+        filter_ms: int = 160,
+        step_size: float = 0.5,
+        max_delay_ms: int = 300,
+        delay_window_ms: int = 1000,
+        delay_update_ms: int = 500,
+        geigel_threshold: float = 0.5,
+        dtd_hangover_blocks: int = 20,
+        suppression_floor: float = 0.05,
+        over_subtraction: float = 1.5,
+        max_reference_s: float = 60.0,
+    ):
+        self.sample_rate = sample_rate
+        self.B = block_size
+        self.P = max(1, int(sample_rate * filter_ms / 1000) // block_size)
+        self.K = block_size + 1
+        self.mu = step_size
+        self.geigel_threshold = geigel_threshold
+        self.dtd_hangover_blocks = dtd_hangover_blocks
+        self.suppression_floor = suppression_floor
+        self.over_subtraction = over_subtraction
+
+        self.max_delay = int(sample_rate * max_delay_ms / 1000)
+        self.delay_window = int(sample_rate * delay_window_ms / 1000)
+        self.delay_update_blocks = max(1, int(sample_rate * delay_update_ms / 1000) // block_size)
+        self.delay = 0
+        self.bulk_delay = 0
+        self._delay_candidate = None
+
+        history = self.delay_window + self.max_delay + self.P * self.B + self.B
+        # Holds a whole reply queued ahead of playout (longest expected: `max_reference_s`)
+        self._fifo = _ReferenceFifo(sample_rate * 2, int(sample_rate * max_reference_s))
+        self._ref_hist = _FloatRing(history)
+        self._mic_hist = _FloatRing(self.delay_window)
+
+        self._W = np.zeros((self.P, self.K), dtype=np.complex64)
+        self._X = np.zeros((self.P, self.K), dtype=np.complex64)
+        self._power = np.full(self.K, 1e-3, dtype=np.float32)
+        self._res_gain = np.ones(self.K, dtype=np.float32)
+
+        # Scratch buffers reused every block
+        self._x_now = np.zeros(self.B, dtype=np.float32)
+        self._x_blk = np.zeros(self.B, dtype=np.float32)
+        self._x2 = np.zeros(2 * self.B, dtype=np.float32)
+        self._e2 = np.zeros(2 * self.B, dtype=np.float32)
+        self._e_prev = np.zeros(self.B, dtype=np.float32)
+        self._y2 = np.zeros(2 * self.B, dtype=np.float32)
+        self._tail = np.zeros(self.P * self.B, dtype=np.float32)
+        self._in_fifo = np.zeros(0, dtype=np.float32)
+        self._out_fifo = np.zeros(0, dtype=np.float32)
+
+        self._blocks = 0
+        self._dtd_hold = 0
+        self.frames = 0
+        self.cpu_s = 0.0
+        self.max_frame_s = 0.0
+        self.audio_s = 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        """CPU seconds per second of audio (must stay well below 1.0)."""
+        return self.cpu_s / self.audio_s if self.audio_s else 0.0
+
+    def push_reference(self, x: np.ndarray):
+        """Far-end audio (float32, mic rate) about to be played."""
+        self._fifo.push(x)
+
+    def flush_reference(self):
+        """Drops far-end audio that will no longer be played (interruption). Keeps the filter."""
+        self._fifo.clear()
+
+    def reset(self):
+        self._W[:] = 0
+        self._X[:] = 0
+        self._res_gain[:] = 1.0
+        self._fifo.clear()
+
+    def process(self, mic: np.ndarray) -> np.ndarray:
+        """Cancels echo from one mic frame (float32). Returns a frame of the same length."""
+        start = time.perf_counter()
+        n = len(mic)
+        B = self.B
+
+        if n % B == 0 and len(self._in_fifo) == 0:
+            out = np.empty(n, dtype=np.float32)
+            for i in range(0, n, B):
+                out[i:i + B] = self._process_block(mic[i:i + B])
+        else:
+            self._in_fifo = np.concatenate((self._in_fifo, mic))
+            blocks = []
+            while len(self._in_fifo) >= B:
+                blocks.append(self._process_block(self._in_fifo[:B]))
+                self._in_fifo = self._in_fifo[B:]
+            self._out_fifo = np.concatenate([self._out_fifo] + blocks)
+            if len(self._out_fifo) < n:
+                # Only happens until the first full block: pad once with silence
+                self._out_fifo = np.concatenate((np.zeros(n - len(self._out_fifo), dtype=np.float32), self._out_fifo))
+            out = self._out_fifo[:n]
+            self._out_fifo = self._out_fifo[n:]
+
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.cpu_s += elapsed
+        self.max_frame_s = max(self.max_frame_s, elapsed)
+        self.audio_s += n / self.sample_rate
+        return out
+
+    def _process_block(self, d: np.ndarray) -> np.ndarray:
+        B = self.B
+
+        # 1. What the speaker plays during this block, and the bulk-delayed copy the
+        #    filter sees (aligned with when it reaches the mic)
+        self._fifo.pop(B, self._x_now)
+        self._ref_hist.write(self._x_now)
+        self._mic_hist.write(d)
+        self._ref_hist.read(B, offset=self.bulk_delay, out=self._x_blk)
+
+        self._blocks += 1
+        if self._blocks % self.delay_update_blocks == 0:
+            self._update_delay()
+
+        # 2. Overlap-save filtering: spectrum of [previous block | current block]
+        self._x2[:B] = self._x2[B:]
+        self._x2[B:] = self._x_blk
+        Xk = np.fft.rfft(self._x2)
+        self._X[1:] = self._X[:-1]
+        self._X[0] = Xk
+        Y = np.einsum("pk,pk->k", self._X, self._W)
+        y = np.fft.irfft(Y, n=2 * B)[B:].astype(np.float32)
+        e = d - y
+
+        # 3. Adapt unless the near end is talking (Geigel) or there is nothing to learn from
+        far_peak = self._far_peak()
+        if far_peak > 1e-4 and np.max(np.abs(d)) > self.geigel_threshold * far_peak:
+            self._dtd_hold = self.dtd_hangover_blocks
+        elif self._dtd_hold > 0:
+            self._dtd_hold -= 1
+
+        self._power = 0.9 * self._power + 0.1 * (Xk.real ** 2 + Xk.imag ** 2)
+        if far_peak > 1e-4 and self._dtd_hold == 0:
+            self._e2[:B] = 0.0
+            self._e2[B:] = e
+            E = np.fft.rfft(self._e2)
+            G = (self.mu / self.P) * E / (self._power + 1e-6)
+            self._W += np.conj(self._X) * G
+            # Gradient constraint: keep each partition's impulse response to B taps
+            w = np.fft.irfft(self._W, n=2 * B, axis=1)
+            w[:, B:] = 0.0
+            self._W[:] = np.fft.rfft(w, axis=1)
+
+        # 4. Residual echo suppression, only while there is far-end signal
+        if far_peak > 1e-4:
+            return self._suppress(e, y)
+        self._res_gain[:] = 1.0
+        self._e_prev[:] = e
+        return e
+
+    def _far_peak(self) -> float:
+        # Peak of the reference over the filter span that can echo into this block
+        self._ref_hist.read(self.P * self.B, offset=self.bulk_delay, out=self._tail)
+        return float(max(self._tail.max(), -self._tail.min()))
+
+    def _suppress(self, e: np.ndarray, y: np.ndarray) -> np.ndarray:
+        B = self.B
+        self._e2[:B] = self._e_prev
+        self._e2[B:] = e
+        self._y2[B:] = y
+        Ef = np.fft.rfft(self._e2)
+        Yf = np.fft.rfft(self._y2)
+        se = Ef.real ** 2 + Ef.imag ** 2
+        sy = Yf.real ** 2 + Yf.imag ** 2
+        gain = 1.0 - self.over_subtraction * sy / (se + 1e-9)
+        np.clip(gain, self.suppression_floor, 1.0, out=gain)
+        # Fast attack, slower release to avoid musical noise
+        self._res_gain = np.where(gain < self._res_gain, gain, 0.7 * self._res_gain + 0.3 * gain).astype(np.float32)
+        self._e_prev[:] = e
+        return np.fft.irfft(Ef * self._res_gain, n=2 * B)[B:].astype(np.float32)
+
+    def _update_delay(self):
+        """GCC-PHAT between the last `delay_window` of mic and reference audio."""
+        N = self.delay_window
+        ref = self._ref_hist.read(N)
+        if float(np.dot(ref, ref)) < N * 1e-6:
+            return  # no far-end signal to correlate against
+        mic = self._mic_hist.read(N)
+        nfft = 2 * N
+        R = np.fft.rfft(mic, nfft) * np.conj(np.fft.rfft(ref, nfft))
+        # Regularised PHAT: whiten, but don't amplify bins the reference never excites
+        mag = np.abs(R)
+        R /= mag + 1e-3 * mag.max() + 1e-12
+        cc = np.fft.irfft(R, nfft)[:self.max_delay + 1]
+        lag = int(np.argmax(cc))
+        # Require a clear peak, and the same answer twice, before moving the bulk delay
+        if cc[lag] < 4.0 * (np.mean(np.abs(cc)) + 1e-12):
+            return
+        candidate, self._delay_candidate = self._delay_candidate, lag
+        if candidate is None or abs(candidate - lag) > self.B:
+            return
+        self.delay = lag
+        # Only move the bulk delay (and restart adaptation) when the echo peak has
+        # left the span the filter already covers
+        if self.bulk_delay <= lag <= self.bulk_delay + (self.P - 1) * self.B:
+            return
+        self.bulk_delay = max(0, lag - self.B)
+        self._W[:] = 0
+        self._X[:] = 0
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Optional
+
+from pipecat.frames.frames import InputAudioRawFrame, OutputAudioRawFrame, StartFrame, EndFrame, CancelFrame
+from pipecat.processors.frame_processor import FrameProcessor
+from pipecat.transports.base_input import BaseInputTransport
+from pipecat.transports.base_output import BaseOutputTransport
+from pipecat.transports.base_transport import BaseTransport, TransportParams
+
+FRAME_MS = 20
+
+
+class QueueAudioInputTransport(BaseInputTransport):
+    """Pushes 16-bit PCM fed through QueueAudioTransport.feed() into the pipeline."""
+
+    def __init__(self, params: TransportParams, audio: asyncio.Queue):
+        super().__init__(params)
+        self._audio = audio
+        self._sample_rate = 0
+        self._reader = None
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        self._sample_rate = self._params.audio_in_sample_rate or frame.audio_in_sample_rate
+        if not self._reader:
+            self._reader = self.create_task(self._read())
+        await self.set_transport_ready(frame)
+
+    async def stop(self, frame: EndFrame):
+        await self._stop_reader()
+        await super().stop(frame)
+
+    async def cancel(self, frame: CancelFrame):
+        await self._stop_reader()
+        await super().cancel(frame)
+
+    async def _stop_reader(self):
+        if self._reader:
+            await self.cancel_task(self._reader)
+            self._reader = None
+
+    async def _read(self):
+        while True:
+            audio = await self._audio.get()
+            if audio is None:
+                # Caller is done feeding; the pipeline keeps running until it's ended
+                return
+            await self.push_audio_frame(
+                InputAudioRawFrame(audio=audio, sample_rate=self._sample_rate, num_channels=self._params.audio_in_channels)
+            )
+
+
+class QueueAudioOutputTransport(BaseOutputTransport):
+    """Collects the agent's output audio into QueueAudioTransport.audio_out instead of a sound card."""
+
+    def __init__(self, params: TransportParams, audio: asyncio.Queue):
+        super().__init__(params)
+        self._audio = audio
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame) -> bool:
+        self._audio.put_nowait(frame.audio)
+        return True
+
+
+class QueueAudioTransport(BaseTransport):
+    """
+    In-process audio transport: no PyAudio, no devices.
+
+    `feed()` queues 16-bit PCM at `audio_in_sample_rate` (split into 20 ms frames) for
+    the input side and `end_input()` marks the end of it; output audio lands in
+    `audio_out` as raw PCM chunks. Used to run many calls in one process and to drive
+    pipelines from scripts. Feeding is not paced: callers that need real time sleep
+    between feeds.
+    """
+
+    def __init__(self, params: TransportParams):
+        super().__init__()
+        self._params = params
+        self._audio_in: asyncio.Queue = asyncio.Queue()
+        self.audio_out: asyncio.Queue = asyncio.Queue()
+        self._input: Optional[QueueAudioInputTransport] = None
+        self._output: Optional[QueueAudioOutputTransport] = None
+
+    @property
+    def frame_bytes(self) -> int:
+        return int(self._params.audio_in_sample_rate * FRAME_MS / 1000) * 2 * self._params.audio_in_channels
+
+    def feed(self, pcm: bytes):
+        step = self.frame_bytes
+        for i in range(0, len(pcm) - step + 1, step):
+            self._audio_in.put_nowait(pcm[i:i + step])
+
+    def end_input(self):
+        self._audio_in.put_nowait(None)
+
+    def input(self) -> FrameProcessor:
+        if not self._input:
+            self._input = QueueAudioInputTransport(self._params, self._audio_in)
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        if not self._output:
+            self._output = QueueAudioOutputTransport(self._params, self.audio_out)
+        return self._output
+
+
+def create_queue_transport(
+    audio_out_sample_rate=44100,
+    audio_in_sample_rate=16000,
+    audio_out_enabled=True,
+    audio_in_enabled=True,
+    audio_out_10ms_chunks=2,
+    vad_analyzer=None
+):
+    """
+    Creates a QueueAudioTransport with the same defaults as create_transport.
+    """
+    return QueueAudioTransport(
+        TransportParams(
+            audio_out_sample_rate=audio_out_sample_rate,
+            audio_in_sample_rate=audio_in_sample_rate,
+            audio_out_enabled=audio_out_enabled,
+            audio_in_enabled=audio_in_enabled,
+            audio_out_10ms_chunks=audio_out_10ms_chunks,
+            vad_analyzer=vad_analyzer,
+        )
+    )
@@ -0,0 +1,106 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+import scipy.signal
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pipecat.frames.frames import AudioRawFrame, Frame
+from pipecat.processors.frame_processor import FrameProcessor
+
+
+@lru_cache(maxsize=16)
+def polyphase_bank(in_rate: int, out_rate: int):
+    """
+    Returns (up, down, bank) for in_rate -> out_rate. `bank[p]` holds the taps of
+    polyphase branch p, reversed so it lines up with a window of input samples
+    ordered oldest -> newest. Same anti-aliasing filter as scipy's resample_poly
+    (Kaiser window, beta=5, half length 10 * max(up, down)); built once per pair.
+    """
+    g = math.gcd(in_rate, out_rate)
+    up, down = out_rate // g, in_rate // g
+    half_len = 10 * max(up, down)
+    h = scipy.signal.firwin(2 * half_len + 1, 1.0 / max(up, down), window=("kaiser", 5.0)) * up
+    taps = -(-len(h) // up)  # ceil
+    h = np.concatenate((h, np.zeros(taps * up - len(h))))
+    bank = h.reshape(taps, up).T[:, ::-1]
+    return up, down, np.ascontiguousarray(bank, dtype=np.float32)
+
+
+class StreamingResampler:
+    """
+    Stateful polyphase resampler for a continuous stream cut into arbitrary chunks.
+
+    The last (taps - 1) input samples and the output phase carry over between calls,
+    so chunk boundaries are invisible: streaming a signal in pieces gives the same
+    samples as filtering it in one go (delayed by the filter's group delay, about
+    half a tap span, ~0.6 ms for 44.1 kHz -> 16 kHz).
+    """
+
+    def __init__(self, in_rate: int, out_rate: int):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up, self.down, self._bank = polyphase_bank(in_rate, out_rate)
+        self._taps = self._bank.shape[1]
+        self._history = np.zeros(self._taps - 1, dtype=np.float32)
+        # Position of the next output in the upsampled timeline, relative to the
+        # first sample of the next input chunk
+        self._t = 0
+
+    def reset(self):
+        self._history[:] = 0.0
+        self._t = 0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Resamples a float32 chunk; returns however many output samples it completes."""
+        n = len(x)
+        if self.up == self.down:
+            return x
+        L, M = self.up, self.down
+        count = max(0, -(-(n * L - self._t) // M))
+        if count == 0:
+            self._t -= n * L
+            self._history = np.concatenate((self._history, x))[-(self._taps - 1):]
+            return np.zeros(0, dtype=np.float32)
+
+        buf = np.concatenate((self._history, x.astype(np.float32, copy=False)))
+        ts = self._t + M * np.arange(count)
+        phases = ts % L
+        starts = ts // L  # window over buf[start : start + taps] ends at input sample ts // L
+        windows = sliding_window_view(buf, self._taps)[starts]
+        out = np.einsum("ij,ij->i", windows, self._bank[phases])
+
+        self._t = int(ts[-1]) + M - n * L
+        self._history = buf[-(self._taps - 1):].copy()
+        return out.astype(np.float32, copy=False)
+
+    def process_int16(self, audio: bytes) -> bytes:
+        x = np.frombuffer(audio, dtype=np.int16).astype(np.float32)
+        y = self.process(x)
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16).tobytes()
+
+
+class StreamingResampleProcessor(FrameProcessor):
+    """
+    Resamples mono audio frames to `out_rate`, keeping one StreamingResampler per
+    input rate so filter state survives across frames. Put it in front of STT (or
+    anything else that wants a fixed rate); other frames pass through.
+    """
+
+    def __init__(self, out_rate: int = 16000, **kwargs):
+        super().__init__(**kwargs)
+        self._out_rate = out_rate
+        self._resamplers = {}
+
+    async def process_frame(self, frame: Frame, direction):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, AudioRawFrame) and frame.sample_rate != self._out_rate:
+            resampler = self._resamplers.get(frame.sample_rate)
+            if resampler is None:
+                resampler = StreamingResampler(frame.sample_rate, self._out_rate)
+                self._resamplers[frame.sample_rate] = resampler
+            audio = resampler.process_int16(frame.audio)
+            frame = frame.__class__(audio=audio, sample_rate=self._out_rate, num_channels=frame.num_channels)
+
+        await self.push_frame(frame, direction)
@@ -0,0 +1,93 @@
+import numpy as np
+
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+class ReferenceRingBuffer:
+    """
+    Preallocated circular buffer of far-end (bot) audio with a block-wise peak envelope.
+
+    Writes copy the incoming int16 chunk straight into the float32 ring (at most two
+    slice writes, no per-chunk array allocation) and refresh the peak of only the
+    blocks they touched, then the window peak (a max over window_ms / block_ms block
+    peaks, 40 by default). `peak()` is a plain attribute read for the mic side.
+
+    The window is sized in milliseconds, so it holds the same amount of time whether
+    the output runs at 16 kHz or 44.1 kHz; `ensure_rate()` resizes it once if the
+    transport's output rate differs from the configured one.
+    """
+
+    def __init__(self, sample_rate: int = 16000, window_ms: int = 400, block_ms: int = 10):
+        self.window_ms = window_ms
+        self.block_ms = block_ms
+        self.sample_rate = 0
+        self.ensure_rate(sample_rate)
+
+    def ensure_rate(self, sample_rate: int):
+        """(Re)allocates the ring for `sample_rate`. No-op if it already matches."""
+        if sample_rate == self.sample_rate:
+            return
+        self.sample_rate = sample_rate
+        self.block_size = max(1, int(sample_rate * self.block_ms / 1000))
+        self.num_blocks = max(1, self.window_ms // self.block_ms)
+        self.size = self.block_size * self.num_blocks
+        self.samples = np.zeros(self.size, dtype=np.float32)
+        self.block_peaks = np.zeros(self.num_blocks, dtype=np.float32)
+        self.write_index = 0
+        self.total_written = 0
+        self._peak = 0.0
+
+    def write(self, audio_int16: np.ndarray):
+        """Appends int16 samples (oldest samples are overwritten)."""
+        n = len(audio_int16)
+        if n == 0:
+            return
+        if n > self.size:
+            # Only the newest window survives anyway
+            audio_int16 = audio_int16[-self.size:]
+            n = self.size
+
+        start = self.write_index
+        first = min(n, self.size - start)
+        np.multiply(audio_int16[:first], INT16_SCALE, out=self.samples[start:start + first], dtype=np.float32)
+        if first < n:
+            np.multiply(audio_int16[first:], INT16_SCALE, out=self.samples[:n - first], dtype=np.float32)
+
+        self._update_peaks(start, n)
+        self._peak = float(self.block_peaks.max())
+        self.write_index = (start + n) % self.size
+        self.total_written += n
+
+    def _update_peaks(self, start: int, n: int):
+        bs = self.block_size
+        pos = start
+        remaining = n
+        while remaining > 0:
+            block = pos // bs
+            block_start = block * bs
+            end = min(block_start + bs, pos + remaining)
+            seg = self.samples[pos:end]
+            # max(|x|) without allocating np.abs(seg)
+            seg_peak = max(seg.max(), -seg.min())
+            if pos == block_start:
+                # Entering a block: its previous contents are a full window old
+                self.block_peaks[block] = seg_peak
+            elif seg_peak > self.block_peaks[block]:
+                self.block_peaks[block] = seg_peak
+            remaining -= end - pos
+            pos = end % self.size
+
+    def peak(self) -> float:
+        """Peak |amplitude| (0..1) over the last window."""
+        return self._peak
+
+    def latest(self, n: int, out: np.ndarray = None) -> np.ndarray:
+        """Copies the newest `n` samples, oldest first, into `out` (allocated if None)."""
+        n = min(n, self.size)
+        if out is None:
+            out = np.empty(n, dtype=np.float32)
+        start = (self.write_index - n) % self.size
+        first = min(n, self.size - start)
+        out[:first] = self.samples[start:start + first]
+        if first < n:
+            out[first:n] = self.samples[:n - first]
+        return out
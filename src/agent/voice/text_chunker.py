@@ -0,0 +1,225 @@
+import asyncio
+import re
+import time
+from typing import Iterable, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    Frame,
+    TextFrame,
+    AggregatedTextFrame,
+    LLMFullResponseStartFrame,
+    LLMFullResponseEndFrame,
+    InterruptionFrame,
+    EndFrame,
+    CancelFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from src.agent.metrics.histogram import LatencyHistogram
+
+# Clause end for the first chunk; sentence end afterwards. Both need the following
+# whitespace, so "3.5" or "e.g." mid-stream doesn't split.
+_CLAUSE_END = re.compile(r"[,;:.!?—]+[\"')\]]*\s")
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s")
+_MARKUP = [
+    re.compile(r"<\|[^|]*\|>"),                   # chat-template tokens
+    re.compile(r"<(think|thinking|reasoning|analysis)>.*?</\1>", re.DOTALL),  # hidden reasoning
+    re.compile(r"</?[a-zA-Z_][^>]*>"),            # XML/HTML tags
+    re.compile(r"\{[^{}]*\}"),                    # JSON argument blobs
+    re.compile(r"\[(?:TOOL_CALLS|tool_call)[^\]]*\]", re.IGNORECASE),
+    re.compile(r"\*\*|__|`+|^#+\s*|^\s*[-*]\s+", re.MULTILINE),
+]
+_SPACES = re.compile(r"[ \t]+")
+
+
+class TextChunker(FrameProcessor):
+    """
+    Groups streamed LLM text into TTS-sized chunks, optimized for time to first audio.
+
+    Goes between the LLM and the TTS. The first chunk of a response is flushed as soon
+    as it has a clause end (after `min_first_words`), reaches `max_first_words`, or
+    `first_chunk_ms` has passed since the first token (complete words only). After
+    that, text goes out in whole sentences, capped at `max_words`. Chunks are pushed
+    as AggregatedTextFrames, which the TTS synthesizes as-is without re-aggregating.
+
+    Tool-call chatter (calls to `tool_names` written as text, JSON argument blobs,
+    template tokens) and markdown/XML markup are stripped before flushing.
+    """
+
+    def __init__(
+        self,
+        first_chunk_ms: int = 300,
+        min_first_words: int = 2,
+        max_first_words: int = 8,
+        max_words: int = 40,
+        tool_names: Iterable[str] = (),
+    ):
+        super().__init__()
+        self.first_chunk_s = first_chunk_ms / 1000
+        self.min_first_words = min_first_words
+        self.max_first_words = max_first_words
+        self.max_words = max_words
+        names = "|".join(re.escape(n) for n in tool_names)
+        self._chatter = [re.compile(rf"\b(?:functions\.)?(?:{names})\s*\([^)]*\)?")] if names else []
+        self._chatter.append(re.compile(r"\bfunctions\.\w+"))
+
+        self._in_response = False
+        self._buffer = ""
+        self._first_sent = False
+        self._response_start = 0.0
+        self._first_token_at: Optional[float] = None
+        self._deadline_task = None
+
+        self.first_chunk = LatencyHistogram()  # LLM response start -> first chunk flushed
+        self.first_chunk_after_token = LatencyHistogram()  # first token -> first chunk flushed
+        self.flush_reasons = {"clause": 0, "words": 0, "deadline": 0, "sentence": 0, "end": 0}
+        self.stripped_chars = 0
+        self._logged = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, LLMFullResponseStartFrame):
+            await self._reset()
+            self._in_response = True
+            self._response_start = time.monotonic()
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, TextFrame) and self._in_response and not frame.skip_tts:
+            # Text is re-emitted in chunks; the frame itself stops here
+            if self._first_token_at is None:
+                self._first_token_at = time.monotonic()
+                self._deadline_task = self.create_task(self._deadline())
+            self._buffer += frame.text
+            await self._maybe_flush()
+        elif isinstance(frame, LLMFullResponseEndFrame) and self._in_response:
+            await self._flush(self._buffer, "end")
+            await self._reset()
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, InterruptionFrame):
+            await self._reset()
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            await self._reset()
+            self.log_stats()
+            await self.push_frame(frame, direction)
+        else:
+            await self.push_frame(frame, direction)
+
+    async def _reset(self):
+        if self._deadline_task:
+            await self.cancel_task(self._deadline_task)
+            self._deadline_task = None
+        self._in_response = False
+        self._buffer = ""
+        self._first_sent = False
+        self._first_token_at = None
+
+    async def _maybe_flush(self):
+        if self._open_markup(self._buffer):
+            return
+        if not self._first_sent:
+            match = self._boundary(_CLAUSE_END, self._buffer)
+            if match and len(self._buffer[:match].split()) >= self.min_first_words:
+                await self._flush(self._buffer[:match], "clause")
+            elif len(self._buffer.split()) > self.max_first_words:
+                await self._flush_words("words")
+            return
+
+        match = self._boundary(_SENTENCE_END, self._buffer)
+        if match:
+            await self._flush(self._buffer[:match], "sentence")
+        elif len(self._buffer.split()) > self.max_words:
+            match = self._boundary(_CLAUSE_END, self._buffer)
+            if match:
+                await self._flush(self._buffer[:match], "words")
+            else:
+                await self._flush_words("words")
+
+    async def _deadline(self):
+        await asyncio.sleep(self.first_chunk_s)
+        self._deadline_task = None
+        if self._in_response and not self._first_sent and not self._open_markup(self._buffer):
+            await self._flush_words("deadline")
+
+    async def _flush_words(self, reason: str):
+        # Up to the last complete word outside any markup; a trailing partial word waits
+        # for the next token
+        cut = len(self._buffer)
+        while True:
+            cut = max(self._buffer.rfind(" ", 0, cut), self._buffer.rfind("\n", 0, cut))
+            if cut <= 0:
+                return
+            if not self._open_markup(self._buffer[:cut]):
+                await self._flush(self._buffer[:cut + 1], reason)
+                return
+
+    async def _flush(self, raw: str, reason: str):
+        self._buffer = self._buffer[len(raw):]
+        text = self._clean(raw)
+        if not text.strip():
+            return
+        self.flush_reasons[reason] += 1
+        if not self._first_sent:
+            self._first_sent = True
+            now = time.monotonic()
+            self.first_chunk.record((now - self._response_start) * 1000)
+            if self._first_token_at is not None:
+                self.first_chunk_after_token.record((now - self._first_token_at) * 1000)
+            if self._deadline_task:
+                await self.cancel_task(self._deadline_task)
+                self._deadline_task = None
+        await self.push_frame(AggregatedTextFrame(text, "sentence"))
+
+    def _clean(self, text: str) -> str:
+        cleaned = text
+        for pattern in self._chatter + _MARKUP:
+            # Until nothing changes: removing an inner JSON object exposes the outer one
+            removed = 1
+            while removed:
+                cleaned, removed = pattern.subn(" ", cleaned)
+        cleaned = _SPACES.sub(" ", cleaned)
+        # Keep the boundary space so the TTS hears separate chunks as separate words
+        if text[-1:].isspace() and not cleaned[-1:].isspace():
+            cleaned += " "
+        self.stripped_chars += max(0, len(text) - len(cleaned))
+        return cleaned.lstrip()
+
+    def _boundary(self, pattern: re.Pattern, text: str) -> Optional[int]:
+        # Last match of `pattern` that isn't inside markup
+        end = None
+        for match in pattern.finditer(text):
+            if not self._open_markup(text[:match.end()]):
+                end = match.end()
+        return end
+
+    @staticmethod
+    def _open_markup(text: str) -> bool:
+        # Don't split inside a tag, template token, JSON blob or code span still streaming in
+        return (
+            text.rfind("<") > text.rfind(">")
+            or text.count("{") > text.count("}")
+            or text.count("`") % 2 == 1
+            or text.rfind("(") > text.rfind(")")
+        )
+
+    def stats(self) -> dict:
+        return {
+            "first_chunk": self.first_chunk.summary(),
+            "first_chunk_after_token": self.first_chunk_after_token.summary(),
+            "flush_reasons": dict(self.flush_reasons),
+            "stripped_chars": self.stripped_chars,
+        }
+
+    def log_stats(self):
+        if self._logged or not self.first_chunk.count:
+            return
+        self._logged = True
+        a = self.first_chunk.summary()
+        b = self.first_chunk_after_token.summary()
+        logger.info(
+            f"TextChunker: first chunk p50 {a['p50_ms']:g} / p95 {a['p95_ms']:g} ms after LLM start "
+            f"(p50 {b['p50_ms']:g} / p95 {b['p95_ms']:g} ms after first token) over {a['count']} responses; "
+            f"flushes {self.flush_reasons}, {self.stripped_chars} chars stripped"
+        )
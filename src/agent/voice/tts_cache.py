@@ -0,0 +1,437 @@
+import asyncio
+import bisect
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from loguru import logger
+
+from pipecat.frames.frames import (
+    Frame,
+    StartFrame,
+    EndFrame,
+    CancelFrame,
+    TextFrame,
+    LLMFullResponseStartFrame,
+    LLMFullResponseEndFrame,
+    InterruptionFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TTSAudioRawFrame,
+    TTSTextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from src.agent.cache.lru import LRUCache
+from src.agent.security.heuristics import normalize_text
+
+PhraseKey = Tuple[str, str, int, str]  # (voice_id, model_id, sample_rate, normalized text)
+# synthesize(text, sample_rate) -> 16-bit mono PCM
+Synthesizer = Callable[[str, int], Awaitable[Optional[bytes]]]
+
+PLAYBACK_CHUNK_MS = 40
+
+
+class TTSPhraseStore:
+    """
+    PCM audio of spoken phrases, keyed by (voice, model, sample rate, normalized text).
+
+    Audio is kept in an LRUCache memory tier in front of a SQLite file (when `path`
+    is set); the phrase texts for the current voice are always in memory, sorted, so
+    `is_prefix()` is a bisect. Disk reads and writes run in a thread.
+    """
+
+    def __init__(self, voice_id: str, model_id: str, path: Optional[str] = None, memory_entries: int = 64):
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.path = path
+        self.sample_rate = 0
+        self._memory = LRUCache(max_entries=memory_entries, ttl_s=None)
+        self._texts: Dict[str, str] = {}  # normalized -> spoken text, for this voice/model/rate
+        self._sorted: List[str] = []
+
+    def key(self, normalized: str) -> PhraseKey:
+        return self.voice_id, self.model_id, self.sample_rate, normalized
+
+    async def set_sample_rate(self, sample_rate: int):
+        """Selects the rate entries are stored and looked up at; loads the phrase list for it."""
+        rows = await asyncio.to_thread(self._read_texts, sample_rate) if self.path else []
+        self.sample_rate = sample_rate
+        self._texts = dict(rows)
+        self._sorted = sorted(self._texts)
+        if self.path:
+            logger.debug(f"TTSPhraseStore: {len(rows)} phrases at {sample_rate} Hz in {self.path}")
+
+    def __contains__(self, normalized: str) -> bool:
+        return normalized in self._texts
+
+    def __len__(self):
+        return len(self._texts)
+
+    def is_prefix(self, normalized: str) -> bool:
+        """True if some stored phrase starts with `normalized` (or equals it)."""
+        i = bisect.bisect_left(self._sorted, normalized)
+        return i < len(self._sorted) and self._sorted[i].startswith(normalized)
+
+    async def get(self, normalized: str) -> Optional[bytes]:
+        if normalized not in self._texts:
+            return None
+        key = self.key(normalized)
+        audio = self._memory.get(key)
+        if audio is None and self.path:
+            audio = await asyncio.to_thread(self._read, key)
+            if audio is not None:
+                self._memory.put(key, audio)
+        return audio
+
+    async def put(self, normalized: str, text: str, audio: bytes):
+        key = self.key(normalized)
+        self._memory.put(key, audio)
+        if normalized not in self._texts:
+            self._texts[normalized] = text
+            bisect.insort(self._sorted, normalized)
+        if self.path:
+            await asyncio.to_thread(self._write, key, text, audio)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tts_cache ("
+            "voice_id TEXT NOT NULL, model_id TEXT NOT NULL, sample_rate INTEGER NOT NULL, "
+            "normalized TEXT NOT NULL, text TEXT NOT NULL, audio BLOB NOT NULL, "
+            "PRIMARY KEY (voice_id, model_id, sample_rate, normalized))"
+        )
+        return db
+
+    def _read_texts(self, sample_rate: int) -> List[Tuple[str, str]]:
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT normalized, text FROM tts_cache WHERE voice_id = ? AND model_id = ? AND sample_rate = ?",
+                (self.voice_id, self.model_id, sample_rate),
+            ).fetchall()
+        db.close()
+        return rows
+
+    def _read(self, key: PhraseKey) -> Optional[bytes]:
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT audio FROM tts_cache WHERE voice_id = ? AND model_id = ? AND sample_rate = ? AND normalized = ?",
+                key,
+            ).fetchone()
+        db.close()
+        return row[0] if row else None
+
+    def _write(self, key: PhraseKey, text: str, audio: bytes):
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO tts_cache VALUES (?, ?, ?, ?, ?, ?)", (*key, text, audio))
+        db.close()
+
+
+class TTSCacheManager:
+    """
+    State shared by the processor pair around the TTS service: the phrase store, the
+    response currently being recorded, and hit/miss/latency counters.
+    """
+
+    def __init__(
+        self,
+        store: TTSPhraseStore,
+        prewarm: Optional[List[str]] = None,
+        synthesize: Optional[Synthesizer] = None,
+        max_phrase_chars: int = 120,
+        min_repeats: int = 2,
+        max_record_s: float = 10.0,
+    ):
+        self.store = store
+        self.prewarm_phrases = list(prewarm or [])
+        self.synthesize = synthesize
+        self.max_phrase_chars = max_phrase_chars
+        self.min_repeats = min_repeats
+        self.max_record_s = max_record_s
+        self.seen = LRUCache(max_entries=512, ttl_s=None)  # normalized -> times sent to TTS
+
+        # Set by the input side for the response the TTS is speaking, read by the output side
+        self.pending: Optional[Tuple[str, str]] = None  # (normalized, text) to record
+        self.responses_in_flight = 0
+        self.text_sent_at: Optional[float] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.prewarmed = 0
+        self.miss_first_audio_ms: List[float] = []
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        first_audio_ms = (
+            sum(self.miss_first_audio_ms) / len(self.miss_first_audio_ms) if self.miss_first_audio_ms else 0.0
+        )
+        return {
+            "phrases": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "recorded": self.recorded,
+            "prewarmed": self.prewarmed,
+            "avg_tts_first_audio_ms": first_audio_ms,
+            # Each hit skips a synthesis whose first audio takes this long on average
+            "saved_first_audio_ms": self.hits * first_audio_ms,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"TTS cache: {s['hits']}/{s['hits'] + s['misses']} short responses from cache ({s['hit_rate']:.0%}), "
+            f"~{s['avg_tts_first_audio_ms']:.0f} ms to first audio saved per hit, {s['recorded']} recorded, "
+            f"{s['prewarmed']} pre-warmed, {s['phrases']} phrases"
+        )
+
+
+class TTSCacheInputProcessor(FrameProcessor):
+    """
+    Goes between the LLM and the TTS service. While a response's text is still the
+    beginning of a cached phrase it is held back; as soon as it diverges, the held
+    frames go to the TTS and the rest streams through. If the whole response is a
+    cached phrase, its audio is pushed downstream instead (through the TTS, which
+    passes audio frames, to transport.output()) and the TTS never sees the text.
+    """
+
+    def __init__(self, manager: TTSCacheManager):
+        super().__init__()
+        self.manager = manager
+        self._in_response = False
+        self._held: List[TextFrame] = []
+        self._text = ""
+        self._holding = False
+        self._sent = False
+        self._prewarm_task = None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        m = self.manager
+
+        if isinstance(frame, StartFrame):
+            await m.store.set_sample_rate(frame.audio_out_sample_rate)
+            if m.prewarm_phrases and m.synthesize:
+                self._prewarm_task = self.create_task(self._prewarm())
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, LLMFullResponseStartFrame):
+            self._in_response, self._holding, self._sent = True, True, False
+            self._held.clear()
+            self._text = ""
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, TextFrame) and self._in_response and not frame.skip_tts:
+            self._text += frame.text
+            if self._holding:
+                self._held.append(frame)
+                if not m.store.is_prefix(normalize_text(self._text)):
+                    await self._release()
+            else:
+                await self.push_frame(frame, direction)
+        elif isinstance(frame, LLMFullResponseEndFrame) and self._in_response:
+            self._in_response = False
+            await self._end_response()
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, InterruptionFrame):
+            self._in_response = False
+            self._held.clear()
+            m.pending = None
+            await self.push_frame(frame, direction)
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            if self._prewarm_task:
+                await self.cancel_task(self._prewarm_task)
+                self._prewarm_task = None
+            m.log_stats()
+            await self.push_frame(frame, direction)
+        else:
+            await self.push_frame(frame, direction)
+
+    async def _release(self):
+        self._holding = False
+        m = self.manager
+        if not self._sent:
+            self._sent = True
+            m.responses_in_flight += 1
+            if m.text_sent_at is None:
+                m.text_sent_at = time.monotonic()
+        held, self._held = self._held, []
+        for frame in held:
+            await self.push_frame(frame)
+
+    async def _end_response(self):
+        m = self.manager
+        text = self._text.strip()
+        normalized = normalize_text(text)
+        if not normalized:
+            await self._release()
+            return
+        short = len(text) <= m.max_phrase_chars
+
+        if self._holding and normalized in m.store:
+            audio = await m.store.get(normalized)
+            if audio is not None:
+                m.hits += 1
+                self._held.clear()
+                await self._play(text, audio)
+                return
+
+        if short:
+            m.misses += 1
+        await self._release()
+        if short:
+            # Record repeated short responses as they are spoken
+            count = (m.seen.get(normalized) or 0) + 1
+            m.seen.put(normalized, count)
+            if count >= m.min_repeats and normalized not in m.store:
+                m.pending = (normalized, text)
+
+    async def _play(self, text: str, audio: bytes):
+        rate = self.manager.store.sample_rate
+        step = rate * PLAYBACK_CHUNK_MS // 1000 * 2
+        await self.push_frame(TTSStartedFrame())
+        for i in range(0, len(audio), step):
+            await self.push_frame(TTSAudioRawFrame(audio=audio[i:i + step], sample_rate=rate, num_channels=1))
+        await self.push_frame(TTSStoppedFrame())
+        # What the TTS would have reported as spoken, for the assistant context
+        spoken = TTSTextFrame(text, aggregated_by="sentence")
+        spoken.skip_tts = True
+        await self.push_frame(spoken)
+
+    async def _prewarm(self):
+        m = self.manager
+        try:
+            for text in m.prewarm_phrases:
+                normalized = normalize_text(text)
+                if not normalized or normalized in m.store:
+                    continue
+                try:
+                    audio = await m.synthesize(text, m.store.sample_rate)
+                except Exception as e:
+                    logger.warning(f"TTS cache: pre-warm of '{text}' failed: {e!r}")
+                    continue
+                if audio:
+                    await m.store.put(normalized, text, audio)
+                    m.prewarmed += 1
+        finally:
+            # Synthesizers that keep a connection (CartesiaSynthesizer) are only used here
+            close = getattr(m.synthesize, "close", None)
+            if close:
+                await close()
+        logger.debug(f"TTS cache: pre-warm done, {len(m.store)} phrases")
+
+
+class TTSCacheOutputProcessor(FrameProcessor):
+    """
+    Goes right after the TTS service. Measures time from text sent to first audio,
+    and records the audio of a response the input side marked as worth caching,
+    provided it was the only response in that TTS run and was not interrupted.
+    """
+
+    def __init__(self, manager: TTSCacheManager):
+        super().__init__()
+        self.manager = manager
+        self._audio = bytearray()
+        self._recording = False
+        self._first_audio = True
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        m = self.manager
+
+        if isinstance(frame, TTSStartedFrame):
+            self._audio.clear()
+            self._recording = True
+            self._first_audio = True
+        elif isinstance(frame, TTSAudioRawFrame):
+            if self._first_audio and m.text_sent_at is not None:
+                m.miss_first_audio_ms.append((time.monotonic() - m.text_sent_at) * 1000)
+                m.text_sent_at = None
+            self._first_audio = False
+            if self._recording:
+                self._audio.extend(frame.audio)
+                if len(self._audio) > m.max_record_s * m.store.sample_rate * 2:
+                    self._recording = False
+        elif isinstance(frame, TTSStoppedFrame):
+            await self._finish()
+        elif isinstance(frame, InterruptionFrame):
+            self._recording = False
+            self._audio.clear()
+            m.pending = None
+            m.responses_in_flight = 0
+            m.text_sent_at = None
+
+        await self.push_frame(frame, direction)
+
+    async def _finish(self):
+        m = self.manager
+        pending, m.pending = m.pending, None
+        single = m.responses_in_flight == 1
+        m.responses_in_flight = 0
+        if pending and single and self._recording and self._audio:
+            normalized, text = pending
+            await m.store.put(normalized, text, bytes(self._audio))
+            m.recorded += 1
+            logger.debug(f"TTS cache: recorded '{text}' ({len(self._audio) // 2} samples)")
+        self._recording = False
+        self._audio.clear()
+
+
+class CartesiaSynthesizer:
+    """
+    Out-of-pipeline synthesis through Cartesia's /tts/bytes endpoint, for pre-warming.
+    One keep-alive session is opened on first use and reused until close().
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        voice_id: str,
+        model_id: str,
+        base_url: str = "https://api.cartesia.ai",
+        cartesia_version: str = "2025-04-16",
+    ):
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.base_url = base_url
+        self._headers = {"Cartesia-Version": cartesia_version, "X-API-Key": api_key}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __call__(self, text: str, sample_rate: int) -> Optional[bytes]:
+        payload = {
+            "model_id": self.model_id,
+            "transcript": text,
+            "voice": {"mode": "id", "id": self.voice_id},
+            "output_format": {"container": "raw", "encoding": "pcm_s16le", "sample_rate": sample_rate},
+            "language": "en",
+        }
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        async with self._session.post(f"{self.base_url}/tts/bytes", json=payload, headers=self._headers) as response:
+            if response.status != 200:
+                logger.warning(f"TTS cache: Cartesia returned {response.status} for '{text}'")
+                return None
+            audio = await response.read()
+        return audio[: len(audio) & ~1]
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def create_tts_cache_processors(
+    voice_id: str,
+    model_id: str,
+    path: Optional[str] = None,
+    prewarm: Optional[List[str]] = None,
+    synthesize: Optional[Synthesizer] = None,
+    **kwargs,
+):
+    """
+    Builds the TTS cache processor pair around one shared TTSCacheManager.
+    Place the input processor right before the TTS service and the output
+    processor right after it.
+    """
+    manager = TTSCacheManager(TTSPhraseStore(voice_id, model_id, path=path), prewarm, synthesize, **kwargs)
+    return TTSCacheInputProcessor(manager), TTSCacheOutputProcessor(manager)
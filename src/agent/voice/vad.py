@@ -1,23 +1,145 @@
-import webrtcvad
+import collections
+
+from loguru import logger
 from pipecat.audio.vad.vad_analyzer import VADAnalyzer
 
+from src.agent.voice.vad_backends import VADBackend, create_vad_backend
+
+WEBRTC_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+WEBRTC_FRAME_MS = (10, 20, 30)
+
 class WebRtcVADAnalyzer(VADAnalyzer):
-    def __init__(self, aggressiveness=3, sample_rate=16000):
-        super().__init__(sample_rate=sample_rate)
-        self._vad = webrtcvad.Vad(aggressiveness)
-        self._frame_duration_ms = 30 # 10, 20, or 30ms
+    """
+    webrtcvad with batched sub-frame evaluation and a smoothed, hysteretic confidence.
+
+    Each analysis window (`window_ms`, a multiple of `frame_duration_ms`) is split into
+    valid 10/20/30 ms sub-frames with memoryview slices (no copies); bytes that don't
+    fill a sub-frame are carried into the next call. Decisions go into a ring of the
+    last `smoothing_frames` sub-frames and the confidence is the speech fraction in it.
+
+    Hysteresis: speech is entered when the fraction reaches `on_threshold` and only
+    left when it drops to `off_threshold` and then stays there for `hangover_ms`. Short
+    pauses inside an utterance therefore don't end the user's turn (and don't trigger
+    an LLM call for half a sentence).
+
+    Frames webrtcvad rejects (wrong size/rate) are counted in `rejected_frames` and
+    logged, instead of silently reading as silence.
+
+    The per-sub-frame decision comes from a pluggable backend (`backend`: "webrtc",
+    "energy", "cascade" or a VADBackend instance); see vad_backends.py. The backend
+    tracks its own CPU time per second of audio.
+    """
+
+    def __init__(
+        self,
+        aggressiveness=3,
+        sample_rate=16000,
+        frame_duration_ms=30,
+        window_ms=90,
+        smoothing_frames=10,
+        on_threshold=0.5,
+        off_threshold=0.2,
+        hangover_ms=300,
+        backend="webrtc",
+        **kwargs,
+    ):
+        if frame_duration_ms not in WEBRTC_FRAME_MS:
+            raise ValueError(f"frame_duration_ms must be one of {WEBRTC_FRAME_MS}")
+        if window_ms % frame_duration_ms:
+            raise ValueError("window_ms must be a multiple of frame_duration_ms")
+        super().__init__(sample_rate=sample_rate, **kwargs)
+        if isinstance(backend, VADBackend):
+            self.backend = backend
+        else:
+            self.backend = create_vad_backend(backend, aggressiveness)
+        self._frame_duration_ms = frame_duration_ms # 10, 20, or 30ms
+        self._window_ms = window_ms
+        self._on_threshold = on_threshold
+        self._off_threshold = off_threshold
+        self._hangover_frames = max(0, hangover_ms // frame_duration_ms)
+
+        self._decisions = collections.deque(maxlen=smoothing_frames)
+        self._speech_count = 0
+        self._speaking = False
+        self._hangover_left = 0
+        self._carry = b""
+
+        self.frames_evaluated = 0
+        self.rejected_frames = 0
+
+    def set_sample_rate(self, sample_rate: int):
+        rate = self._init_sample_rate or sample_rate
+        if rate not in WEBRTC_SAMPLE_RATES:
+            raise ValueError(f"webrtcvad does not support {rate} Hz (use one of {WEBRTC_SAMPLE_RATES})")
+        super().set_sample_rate(sample_rate)
 
     def num_frames_required(self) -> int:
-        # Calculate number of samples per frame
+        # Calculate number of samples per analysis window
         # sample_rate * duration_ms / 1000
-        return int(self.sample_rate * self._frame_duration_ms / 1000)
+        return int(self.sample_rate * self._window_ms / 1000)
+
+    def _sub_frame_bytes(self) -> int:
+        return int(self.sample_rate * self._frame_duration_ms / 1000) * 2
 
     def voice_confidence(self, buffer) -> float:
         # webrtcvad expects 16-bit PCM audio
         # buffer is bytes
+        if self._carry:
+            buffer = self._carry + buffer
+            self._carry = b""
+
+        step = self._sub_frame_bytes()
+        view = memoryview(buffer)
+        usable = len(view) - len(view) % step
+        if usable < len(view):
+            self._carry = bytes(view[usable:])
+
+        if not usable:
+            return self._confidence()
         try:
-            is_speech = self._vad.is_speech(buffer, self.sample_rate)
-            return 1.0 if is_speech else 0.0
+            decisions = self.backend.evaluate(view[:usable], step, self.sample_rate)
         except Exception as e:
-            # print(f"VAD Error: {e}")
+            self.rejected_frames += usable // step
+            if self.rejected_frames == usable // step:
+                logger.warning(f"WebRtcVADAnalyzer: rejected frame ({step} bytes @ {self.sample_rate} Hz): {e}")
+            return self._confidence()
+
+        self.frames_evaluated += len(decisions)
+        for is_speech in decisions:
+            self._push_decision(is_speech)
+
+        return self._confidence()
+
+    def stats(self) -> dict:
+        stats = self.backend.stats()
+        stats["frames_evaluated"] = self.frames_evaluated
+        stats["rejected_frames"] = self.rejected_frames
+        return stats
+
+    def _push_decision(self, is_speech: bool):
+        if len(self._decisions) == self._decisions.maxlen:
+            self._speech_count -= self._decisions[0]
+        self._decisions.append(is_speech)
+        self._speech_count += is_speech
+
+        fraction = self._speech_count / len(self._decisions)
+        if not self._speaking:
+            if fraction >= self._on_threshold:
+                self._speaking = True
+                self._hangover_left = self._hangover_frames
+        elif fraction > self._off_threshold:
+            self._hangover_left = self._hangover_frames
+        elif self._hangover_left > 0:
+            self._hangover_left -= 1
+        else:
+            self._speaking = False
+
+    def _confidence(self) -> float:
+        if not self._decisions:
             return 0.0
+        fraction = self._speech_count / len(self._decisions)
+        # Report the hysteresis state through the confidence the base class thresholds
+        threshold = self.params.confidence
+        if self._speaking:
+            return max(fraction, threshold)
+        return min(fraction, threshold * 0.99)
@@ -0,0 +1,177 @@
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+import webrtcvad
+
+INT16_FULL_SCALE = 32768.0
+
+class VADBackend(ABC):
+    """
+    Sub-frame speech decisions used by WebRtcVADAnalyzer.
+
+    Backends decide a whole analysis window at once (`decide`), so NumPy-based
+    stages can vectorise across its sub-frames. `evaluate()` wraps that with CPU
+    accounting, so every backend can report `cpu_per_audio_second` (CPU seconds
+    spent per second of audio seen).
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.cpu_s = 0.0
+        self.audio_s = 0.0
+        self.frames = 0
+
+    @abstractmethod
+    def decide(self, audio: memoryview, frame_bytes: int, sample_rate: int) -> List[bool]:
+        """
+        `audio` is 16-bit mono PCM, a whole number of `frame_bytes` sub-frames
+        (each 10/20/30 ms). Returns one decision per sub-frame.
+        """
+        pass
+
+    def evaluate(self, audio: memoryview, frame_bytes: int, sample_rate: int) -> List[bool]:
+        start = time.perf_counter()
+        try:
+            return self.decide(audio, frame_bytes, sample_rate)
+        finally:
+            self.cpu_s += time.perf_counter() - start
+            self.audio_s += len(audio) / (2 * sample_rate)
+            self.frames += len(audio) // frame_bytes
+
+    @property
+    def cpu_per_audio_second(self) -> float:
+        return self.cpu_s / self.audio_s if self.audio_s else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "frames": self.frames,
+            "cpu_per_audio_second": self.cpu_per_audio_second,
+        }
+
+
+def _sub_frames(audio: memoryview, frame_bytes: int) -> np.ndarray:
+    """(frames, samples) int16 view of the window, no copy."""
+    return np.frombuffer(audio, dtype=np.int16).reshape(-1, frame_bytes // 2)
+
+
+def frame_energies(frames: np.ndarray) -> np.ndarray:
+    """Mean square of each row of int16 samples."""
+    x = frames.astype(np.float32)
+    return np.einsum("ij,ij->i", x, x) / max(1, frames.shape[1])
+
+
+def db_to_energy(db: float) -> float:
+    """dBFS level -> mean square of int16 samples (so per-frame checks skip the log)."""
+    return INT16_FULL_SCALE ** 2 * 10 ** (db / 10)
+
+
+def zero_crossing_rates(frames: np.ndarray) -> np.ndarray:
+    """Fraction of adjacent sample pairs that change sign, per row."""
+    if frames.shape[1] < 2:
+        return np.zeros(len(frames))
+    signs = np.signbit(frames)
+    return np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+
+
+class EnergyVADBackend(VADBackend):
+    """
+    NumPy RMS + zero-crossing check. Speech needs enough level and a ZCR below
+    that of broadband noise/hiss. Cheap, but easily fooled by loud non-speech.
+    """
+
+    name = "energy"
+
+    def __init__(self, speech_db: float = -40.0, max_zcr: float = 0.35):
+        super().__init__()
+        self.speech_db = speech_db
+        self.max_zcr = max_zcr
+        self._speech_energy = db_to_energy(speech_db)
+
+    def decide(self, audio: memoryview, frame_bytes: int, sample_rate: int) -> List[bool]:
+        frames = _sub_frames(audio, frame_bytes)
+        speech = (frame_energies(frames) >= self._speech_energy) & (zero_crossing_rates(frames) <= self.max_zcr)
+        return speech.tolist()
+
+
+class WebRtcVADBackend(VADBackend):
+    """The webrtcvad GMM classifier (raises webrtcvad.Error on invalid frames)."""
+
+    name = "webrtc"
+
+    def __init__(self, aggressiveness: int = 3):
+        super().__init__()
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def decide(self, audio: memoryview, frame_bytes: int, sample_rate: int) -> List[bool]:
+        is_speech = self._vad.is_speech
+        return [is_speech(audio[o:o + frame_bytes], sample_rate) for o in range(0, len(audio), frame_bytes)]
+
+
+class CascadeVADBackend(VADBackend):
+    """
+    Energy gate -> webrtcvad -> optional confirmation backend.
+
+    Sub-frames below `gate_db` are clear silence and never reach webrtcvad (most of
+    a call is the bot talking or the line being quiet). The gate levels the whole
+    window in one NumPy pass; if nothing in it is above the gate, webrtcvad isn't
+    called at all. Frames webrtcvad calls speech can be double-checked by `confirm`
+    (e.g. a stricter webrtcvad or the energy/ZCR test) to reject hiss and tones.
+    """
+
+    name = "cascade"
+
+    def __init__(
+        self,
+        aggressiveness: int = 3,
+        gate_db: float = -60.0,
+        confirm: Optional[VADBackend] = None,
+    ):
+        super().__init__()
+        self.gate_db = gate_db
+        self._gate_energy = db_to_energy(gate_db)
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.confirm = confirm
+        self.gated_frames = 0
+
+    def decide(self, audio: memoryview, frame_bytes: int, sample_rate: int) -> List[bool]:
+        above = frame_energies(_sub_frames(audio, frame_bytes)) >= self._gate_energy
+        count = len(above)
+        passed = int(np.count_nonzero(above))
+        self.gated_frames += count - passed
+        if not passed:
+            return [False] * count
+
+        decisions = []
+        for i, gate_open in enumerate(above.tolist()):
+            if not gate_open:
+                decisions.append(False)
+                continue
+            frame = audio[i * frame_bytes:(i + 1) * frame_bytes]
+            speech = self._vad.is_speech(frame, sample_rate)
+            if speech and self.confirm is not None:
+                speech = self.confirm.evaluate(frame, frame_bytes, sample_rate)[0]
+            decisions.append(speech)
+        return decisions
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["gated_fraction"] = self.gated_frames / self.frames if self.frames else 0.0
+        return stats
+
+
+VAD_BACKENDS = {
+    "energy": EnergyVADBackend,
+    "webrtc": WebRtcVADBackend,
+    "cascade": CascadeVADBackend,
+}
+
+def create_vad_backend(mode: str, aggressiveness: int = 3) -> VADBackend:
+    if mode not in VAD_BACKENDS:
+        raise ValueError(f"Unknown VAD backend '{mode}', expected one of {tuple(VAD_BACKENDS)}")
+    if mode == "energy":
+        return EnergyVADBackend()
+    return VAD_BACKENDS[mode](aggressiveness=aggressiveness)
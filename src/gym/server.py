@@ -1,5 +1,6 @@
 import os
 import asyncio
+import uuid
 from aiohttp import web
 import socketio
 
@@ -32,6 +33,67 @@ async def handle_press(request):
     
     return web.json_response({'status': 'error', 'message': 'No digit provided'}, status=400)
 
+DTMF_DIGITS = set("0123456789*#")
+DEFAULT_GAP_MS = 300
+MAX_GAP_MS = 2000
+SEQUENCE_TTL_S = 60  # how long a finished sequence can still be waited on
+
+# Sequences play one at a time so two tool calls never interleave their digits
+_sequence_lock = asyncio.Lock()
+_sequences_done = {}  # sequence_id -> asyncio.Event
+_sequence_tasks = set()
+
+async def _play_sequence(sequence_id, digits, gap_ms):
+    try:
+        async with _sequence_lock:
+            for i, digit in enumerate(digits):
+                if i:
+                    await asyncio.sleep(gap_ms / 1000)
+                await sio.emit('press', {'digit': digit})
+            await sio.emit('press_sequence_done', {'sequence_id': sequence_id, 'digits': digits})
+    finally:
+        _sequences_done[sequence_id].set()
+        asyncio.get_running_loop().call_later(SEQUENCE_TTL_S, _sequences_done.pop, sequence_id, None)
+
+@routes.post('/api/press/sequence')
+async def handle_press_sequence(request):
+    """
+    Accepts a whole digit string and plays it with `gap_ms` between presses on the
+    server, answering as soon as it is queued (202) rather than after playback.
+    """
+    data = await request.json()
+    digits = str(data.get('digits', ''))
+    gap_ms = data.get('gap_ms', DEFAULT_GAP_MS)
+    sequence_id = str(data.get('sequence_id') or uuid.uuid4().hex)
+    print(f"Server received press sequence: {digits} (gap {gap_ms} ms)")
+
+    if not digits or any(d not in DTMF_DIGITS for d in digits):
+        return web.json_response({'status': 'error', 'message': 'digits must be 0-9, * or #'}, status=400)
+    if not isinstance(gap_ms, (int, float)) or not 0 <= gap_ms <= MAX_GAP_MS:
+        return web.json_response({'status': 'error', 'message': f'gap_ms must be 0-{MAX_GAP_MS}'}, status=400)
+    if sequence_id in _sequences_done:
+        return web.json_response({'status': 'error', 'message': 'duplicate sequence_id'}, status=409)
+
+    _sequences_done[sequence_id] = asyncio.Event()
+    task = asyncio.create_task(_play_sequence(sequence_id, digits, gap_ms))
+    _sequence_tasks.add(task)
+    task.add_done_callback(_sequence_tasks.discard)
+    return web.json_response(
+        {'status': 'accepted', 'sequence_id': sequence_id, 'digits': digits, 'gap_ms': gap_ms},
+        status=202,
+    )
+
+@routes.post('/api/press/sequence/wait')
+async def handle_press_sequence_wait(request):
+    """Long poll: answers once the sequence has finished playing."""
+    data = await request.json()
+    sequence_id = str(data.get('sequence_id', ''))
+    done = _sequences_done.get(sequence_id)
+    if done is None:
+        return web.json_response({'status': 'error', 'message': 'unknown sequence_id'}, status=404)
+    await done.wait()
+    return web.json_response({'status': 'done', 'sequence_id': sequence_id})
+
 @routes.post('/api/transcription')
 async def handle_transcription(request):
     data = await request.json()
@@ -41,6 +103,19 @@ async def handle_transcription(request):
     await sio.emit('transcript', {'role': role, 'text': text})
     return web.json_response({'status': 'ok'})
 
+@routes.post('/api/transcription/batch')
+async def handle_transcription_batch(request):
+    data = await request.json()
+    events = [
+        {'role': e.get('role', 'system'), 'text': e.get('text', '')}
+        for e in data.get('events', [])
+    ]
+    
+    # One socket message per batch instead of one per line
+    if events:
+        await sio.emit('transcript_batch', {'events': events})
+    return web.json_response({'status': 'ok', 'count': len(events)})
+
 app.add_routes(routes)
 app.router.add_static('/static', static_path)
 
@@ -67,7 +67,7 @@ document.addEventListener('DOMContentLoaded', () => {
         handlePress(data.digit);
     });
 
-    socket.on('transcript', (data) => {
+    function appendTranscript(data) {
         const log = document.getElementById('transcript-log');
         if (!log) return;
 
@@ -82,6 +82,12 @@ document.addEventListener('DOMContentLoaded', () => {
         item.textContent = `${roleLabel}: ${data.text}`;
         log.appendChild(item);
         log.scrollTop = log.scrollHeight;
+    }
+
+    socket.on('transcript', appendTranscript);
+
+    socket.on('transcript_batch', (data) => {
+        (data.events || []).forEach(appendTranscript);
     });
 
     // Manual clicks (for testing)
@@ -0,0 +1,107 @@
+"""
+Per-frame cost of the AEC mic path: float round trip + new frame (previous
+implementation) vs the int16 path (passthrough / fixed-point gain, frame reused).
+
+Reports microseconds per frame and bytes allocated per frame (tracemalloc, which
+also sees NumPy data buffers).
+
+    python -m src.scripts.bench_aec_io
+"""
+import time
+import tracemalloc
+
+import numpy as np
+from pipecat.frames.frames import InputAudioRawFrame
+
+from src.agent.voice.aec import AECManager
+
+RATE = 16000
+FRAME = 320  # 20 ms
+ITERATIONS = 5000
+
+
+def legacy_process(audio: bytes, duck: bool) -> bytes:
+    audio_int16 = np.frombuffer(audio, dtype=np.int16)
+    input_float = audio_int16.astype(np.float32) / 32768.0
+    clean_float = np.zeros_like(input_float) if duck else input_float
+    return (clean_float * 32768.0).astype(np.int16).tobytes()
+
+
+def legacy_step(frame, duck):
+    clean = legacy_process(frame.audio, duck)
+    return frame.__class__(audio=clean, sample_rate=frame.sample_rate, num_channels=frame.num_channels)
+
+
+def make_step(manager):
+    def step(frame, duck):
+        if duck:
+            # Pretend the bot is still talking without paying for buffer_output here
+            manager._playout_end_ms = manager._mic_ms
+        clean = manager.process_input(frame.audio, frame.num_channels, frame.sample_rate)
+        if clean is not frame.audio:
+            frame.audio = clean
+        return frame
+    return step
+
+
+def ducking_manager(gain, duck):
+    manager = AECManager(sample_rate=RATE, duck_gain=gain)
+    if duck:
+        # Loud reference keeps the ducker engaged for the whole run
+        manager.buffer_output((np.ones(FRAME, dtype=np.int16) * 10000).tobytes(), RATE)
+    return manager
+
+
+def noop_step(frame, duck):
+    return frame
+
+
+def measure(step, duck):
+    pcm = (np.random.default_rng(0).standard_normal(FRAME) * 3000).astype(np.int16).tobytes()
+    frame = InputAudioRawFrame(audio=pcm, sample_rate=RATE, num_channels=1)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        frame.audio = pcm
+        step(frame, duck)
+    us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    tracemalloc.start()
+    for _ in range(100):  # warm up scratch buffers
+        frame.audio = pcm
+        step(frame, duck)
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    peaks = []
+    for _ in range(200):
+        frame.audio = pcm
+        tracemalloc.reset_peak()
+        step(frame, duck)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return us, int(np.median(peaks))
+
+
+def measure_net(step, duck):
+    """Subtracts the harness's own cost (a step that does nothing)."""
+    us, mem = measure(step, duck)
+    base_us, base_mem = measure(noop_step, duck)
+    return us - base_us, max(0, mem - base_mem)
+
+
+def main():
+    cases = [
+        ("passthrough", False, 0.0),
+        ("mute", True, 0.0),
+        ("duck -12dB", True, 0.25),
+    ]
+    print(f"{'case':<12} {'impl':<8} {'us/frame':>9} {'bytes/frame':>12}")
+    for name, duck, gain in cases:
+        us, mem = measure_net(legacy_step, duck)
+        print(f"{name:<12} {'legacy':<8} {us:9.2f} {mem:12d}")
+        us, mem = measure_net(make_step(ducking_manager(gain, duck)), duck)
+        print(f"{name:<12} {'int16':<8} {us:9.2f} {mem:12d}")
+
+
+if __name__ == "__main__":
+    main()
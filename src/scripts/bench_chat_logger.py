@@ -0,0 +1,134 @@
+"""
+Microbenchmark: per-frame overhead of ChatLogger.on_push_frame.
+
+Compares the previous str(source)-matching observer against the type-routed one on a
+frame mix dominated by 20ms audio frames, like a live call.
+
+    python -m src.scripts.bench_chat_logger
+"""
+import asyncio
+import contextlib
+import io
+import time
+
+from pipecat.frames.frames import (
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    TranscriptionFrame,
+    InterimTranscriptionFrame,
+    TextFrame,
+    LLMTextFrame,
+    LLMFullResponseStartFrame,
+    LLMFullResponseEndFrame,
+)
+from pipecat.observers.base_observer import FramePushed
+
+from src.agent.factory import ChatLogger
+from src.agent.net.http_pool import HTTPPool
+from src.agent.net.telemetry import TelemetryQueue
+
+
+class FakeProcessor:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class LegacyChatLogger:
+    """The pre-routing implementation, kept here only as a baseline."""
+
+    def __init__(self):
+        self._bot_speaking = False
+        self._start_time = 0
+        self._bot_buffer = ""
+
+    def _send_log(self, role, text):
+        pass
+
+    async def on_push_frame(self, data):
+        frame = data.frame
+        source = data.source
+        if isinstance(frame, TranscriptionFrame):
+            if "Deepgram" in str(source) or "STT" in str(source):
+                print(f"\nUser: {frame.text}")
+                self._send_log("user", frame.text)
+                self._start_time = time.time()
+        elif isinstance(frame, LLMFullResponseStartFrame):
+            if "Groq" in str(source) or "LLM" in str(source):
+                if self._start_time > 0:
+                    print(f"Latency: {int((time.time() - self._start_time) * 1000)}ms")
+                    self._start_time = 0
+                print("Bot: ", end="", flush=True)
+                self._bot_speaking = True
+                self._bot_buffer = ""
+        elif isinstance(frame, LLMFullResponseEndFrame):
+            if "Groq" in str(source) or "LLM" in str(source):
+                print()
+                self._bot_speaking = False
+                if self._bot_buffer:
+                    self._send_log("bot", self._bot_buffer)
+                    self._bot_buffer = ""
+        elif isinstance(frame, TextFrame) and not isinstance(frame, (TranscriptionFrame, InterimTranscriptionFrame)):
+            if self._bot_speaking and ("Groq" in str(source) or "LLM" in str(source)):
+                print(frame.text, end="", flush=True)
+                self._bot_buffer += frame.text
+
+
+def build_stream(transport_in, stt, llm, tts, transport_out, turns=20, audio_per_turn=500):
+    """One turn = audio in, a final transcript, a streamed reply and TTS audio out."""
+    pcm = b"\x00" * 640  # 20ms @ 16kHz mono
+    stream = []
+    for _ in range(turns):
+        for _ in range(audio_per_turn):
+            stream.append(FramePushed(transport_in, stt, InputAudioRawFrame(pcm, 16000, 1), None, 0))
+        stream.append(FramePushed(stt, llm, InterimTranscriptionFrame("press", "u", ""), None, 0))
+        stream.append(FramePushed(stt, llm, TranscriptionFrame("press one", "u", ""), None, 0))
+        stream.append(FramePushed(llm, tts, LLMFullResponseStartFrame(), None, 0))
+        for word in "Sure, pressing one for you now.".split():
+            stream.append(FramePushed(llm, tts, LLMTextFrame(word + " "), None, 0))
+        stream.append(FramePushed(llm, tts, LLMFullResponseEndFrame(), None, 0))
+        for _ in range(audio_per_turn // 2):
+            stream.append(FramePushed(tts, transport_out, OutputAudioRawFrame(pcm, 16000, 1), None, 0))
+    return stream
+
+
+async def run(observer, stream, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in stream:
+            await observer.on_push_frame(data)
+        best = min(best, time.perf_counter() - start)
+    return best / len(stream) * 1e9
+
+
+async def main():
+    transport_in = FakeProcessor("SystemAudioInputTransport#0")
+    stt = FakeProcessor("DeepgramSTTService#0")
+    llm = FakeProcessor("GroqLLMService#0")
+    tts = FakeProcessor("CartesiaTTSService#0")
+    transport_out = FakeProcessor("LocalAudioOutputTransport#0")
+    stream = build_stream(transport_in, stt, llm, tts, transport_out)
+
+    http_pool = HTTPPool(base_url="http://localhost:9")
+    telemetry = TelemetryQueue(http_pool, max_queue=16)
+    legacy = LegacyChatLogger()
+    routed = ChatLogger(telemetry, stt=stt, llm=llm)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_ns = await run(legacy, stream, repeat=5)
+        routed_ns = await run(routed, stream, repeat=5)
+
+    print(f"frames per pass: {len(stream)}")
+    print(f"legacy (str(source) matching): {legacy_ns:8.1f} ns/frame")
+    print(f"routed (type table + identity): {routed_ns:8.1f} ns/frame")
+    print(f"speedup: {legacy_ns / routed_ns:.2f}x")
+
+    await telemetry.close()
+    await http_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+Many calls in one process: SessionManager admission and isolation under load.
+
+Starts `--calls` calls at once against a manager allowing `--max-sessions` running and
+`--max-queued` waiting. Each call uses a QueueAudioTransport; by default the pipeline
+is a loopback (input audio -> output audio, through the transport's VAD), so it runs
+offline, and every call checks it got back exactly its own audio. Reports admitted /
+queued / rejected calls, setup and queue-wait latency and event-loop lag.
+
+With `--agent recording.wav` each call runs the full IVR agent (muted, needs the API
+keys) on that recording instead, sharing one HTTP pool.
+
+    python -m src.scripts.bench_sessions [--calls 20] [--max-sessions 8] [--max-queued 4]
+    python -m src.scripts.bench_sessions --agent call.wav --calls 4
+"""
+import argparse
+import asyncio
+import time
+import wave
+
+import numpy as np
+from loguru import logger
+
+from pipecat.frames.frames import Frame, InputAudioRawFrame, OutputAudioRawFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from src.agent.net.http_pool import HTTPPool
+from src.agent.sessions import SessionManager, SessionRejected, agent_builder
+from src.agent.voice.queue_transport import create_queue_transport
+from src.agent.voice.vad import WebRtcVADAnalyzer
+
+SAMPLE_RATE = 16000
+
+
+class Loopback(FrameProcessor):
+    """Plays the caller's audio back to them."""
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, InputAudioRawFrame):
+            await self.push_frame(OutputAudioRawFrame(frame.audio, frame.sample_rate, frame.num_channels))
+        else:
+            await self.push_frame(frame, direction)
+
+
+def call_audio(index: int, seconds: float) -> bytes:
+    """A tone per call, so crossed audio between calls is detectable."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * (300 + 37 * index) * t)
+    return (tone * 32767).astype(np.int16).tobytes()
+
+
+def read_wav(path: str) -> bytes:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != SAMPLE_RATE:
+            raise SystemExit(f"{path}: need 16-bit mono {SAMPLE_RATE} Hz")
+        return wav.readframes(wav.getnframes())
+
+
+async def feed(transport, pcm: bytes, realtime: bool):
+    step = transport.frame_bytes
+    for i in range(0, len(pcm), step):
+        transport.feed(pcm[i:i + step])
+        if realtime:
+            await asyncio.sleep(step / 2 / SAMPLE_RATE)
+    transport.end_input()
+
+
+async def collect(transport, expected: int) -> bytes:
+    out = bytearray()
+    while len(out) < expected:
+        out += await transport.audio_out.get()
+    return bytes(out)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--max-sessions", type=int, default=8)
+    parser.add_argument("--max-queued", type=int, default=4)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--max-loop-lag-ms", type=float, default=None)
+    parser.add_argument("--seconds", type=float, default=2.0, help="Audio per loopback call")
+    parser.add_argument("--fast", action="store_true", help="Feed audio as fast as possible instead of in real time")
+    parser.add_argument("--agent", metavar="WAV", default=None, help="Run the IVR agent on this recording")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda m: print(m, end=""), level="WARNING")
+
+    transports = {}
+
+    def transport_factory(session, **kwargs):
+        transport = create_queue_transport(audio_in_sample_rate=SAMPLE_RATE, audio_out_sample_rate=SAMPLE_RATE, **kwargs)
+        transports[session.id] = transport
+        return transport
+
+    http_pool = None
+    if args.agent:
+        http_pool = HTTPPool()
+        build = agent_builder(transport_factory, http_pool=http_pool, mute_tts=True)
+    else:
+        async def build(session):
+            transport = transport_factory(session, vad_analyzer=WebRtcVADAnalyzer(aggressiveness=1))
+            pipeline = Pipeline([transport.input(), Loopback(), transport.output()])
+            return PipelineTask(pipeline, params=PipelineParams(audio_in_sample_rate=SAMPLE_RATE, audio_out_sample_rate=SAMPLE_RATE))
+
+    manager = SessionManager(
+        build,
+        max_sessions=args.max_sessions,
+        max_queued=args.max_queued,
+        queue_timeout_s=args.queue_timeout,
+        max_loop_lag_ms=args.max_loop_lag_ms,
+    )
+    results = {"ok": 0, "crossed": 0, "rejected": 0}
+
+    async def call(index: int):
+        try:
+            session = await manager.start(f"call-{index}")
+        except SessionRejected:
+            results["rejected"] += 1
+            return
+        transport = transports[session.id]
+        pcm = read_wav(args.agent) if args.agent else call_audio(index, args.seconds)
+        if args.agent:
+            await feed(transport, pcm, realtime=not args.fast)
+            await manager.stop(session.id)
+            results["ok"] += 1
+            return
+        feeder = asyncio.create_task(feed(transport, pcm, realtime=not args.fast))
+        out = await collect(transport, len(pcm))
+        await feeder
+        await manager.stop(session.id)
+        results["ok" if out[:len(pcm)] == pcm else "crossed"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(args.calls)))
+    elapsed = time.perf_counter() - start
+    await manager.stop_all()
+    if http_pool:
+        await http_pool.close()
+
+    s = manager.stats()
+    print(f"calls: {args.calls} in {elapsed:.1f}s, max {args.max_sessions} running + {args.max_queued} queued")
+    print(f"completed: {results['ok']}  audio crossed: {results['crossed']}  rejected: {results['rejected']} {s['rejected']}")
+    print(f"queue wait: p50 {s['queue_wait']['p50_ms']:g} / max {s['queue_wait']['max_ms']:.0f} ms  "
+          f"setup: p50 {s['setup']['p50_ms']:g} / max {s['setup']['max_ms']:.0f} ms")
+    print(f"loop lag: p50 {s['loop_lag']['p50_ms']:g} / p95 {s['loop_lag']['p95_ms']:g} / max {s['loop_lag']['max_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
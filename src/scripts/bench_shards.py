@@ -0,0 +1,131 @@
+"""
+Event-loop jitter with calls sharded across worker processes vs one process.
+
+Every call is a real-time loopback through the NLMS echo canceller (the CPU-heavy
+part of a call: mic -> AEC -> speaker, with the speaker side as reference), fed
+20 ms frames in real time inside its worker. Calls are placed by ShardSupervisor on
+the least-loaded worker; per-worker loop lag, frames/s and active calls come back
+over the workers' pipes. Run with `--workers 1` for the single-loop baseline.
+
+`--kill-after S` SIGKILLs worker 0 after S seconds to check that it is restarted
+and the other workers' calls carry on.
+
+    python -m src.scripts.bench_shards [--workers N] [--calls 16] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+
+import numpy as np
+from loguru import logger
+
+from pipecat.frames.frames import EndFrame, Frame, InputAudioRawFrame, OutputAudioRawFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from src.agent.sessions import SessionRejected
+from src.agent.supervisor import ShardSupervisor
+from src.agent.voice.aec import create_aec_processors
+from src.agent.voice.queue_transport import create_queue_transport
+
+SAMPLE_RATE = 16000
+
+
+class Loopback(FrameProcessor):
+    """Plays the caller's audio back to them."""
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, InputAudioRawFrame):
+            await self.push_frame(OutputAudioRawFrame(frame.audio, frame.sample_rate, frame.num_channels))
+        else:
+            await self.push_frame(frame, direction)
+
+
+async def feed_call(transport, task, seconds: float, frequency: float):
+    step = transport.frame_bytes
+    t = np.arange(step // 2) / SAMPLE_RATE
+    frame_s = step / 2 / SAMPLE_RATE
+    start = time.monotonic()
+    for i in range(int(seconds / frame_s)):
+        tone = 0.3 * np.sin(2 * np.pi * frequency * (t + i * frame_s))
+        transport.feed((tone * 32767).astype(np.int16).tobytes())
+        # Absolute schedule, so a late wakeup doesn't shift every later frame
+        await asyncio.sleep(max(0.0, start + (i + 1) * frame_s - time.monotonic()))
+    transport.end_input()
+    await task.queue_frame(EndFrame())
+
+
+def make_builder():
+    """Runs in each worker: a loopback-through-AEC call per session."""
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    feeders = set()
+
+    async def build(session):
+        transport = create_queue_transport(audio_in_sample_rate=SAMPLE_RATE, audio_out_sample_rate=SAMPLE_RATE)
+        aec_input, aec_output = create_aec_processors(engine="nlms", sample_rate=SAMPLE_RATE)
+        pipeline = Pipeline([transport.input(), aec_input, Loopback(), aec_output, transport.output()])
+        task = PipelineTask(pipeline, params=PipelineParams(audio_in_sample_rate=SAMPLE_RATE, audio_out_sample_rate=SAMPLE_RATE))
+        feeder = asyncio.create_task(feed_call(transport, task, session.options["seconds"], session.options["frequency"]))
+        feeders.add(feeder)
+        feeder.add_done_callback(feeders.discard)
+        return task
+
+    return build
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--calls", type=int, default=16)
+    parser.add_argument("--max-sessions", type=int, default=32, help="Per worker")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--kill-after", type=float, default=None)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    supervisor = ShardSupervisor(make_builder, workers=args.workers, manager_options={"max_sessions": args.max_sessions})
+    await supervisor.start()
+
+    placed = {}
+    for i in range(args.calls):
+        try:
+            placed[f"call-{i}"] = await supervisor.start_session(f"call-{i}", seconds=args.seconds, frequency=300 + 37 * i)
+        except SessionRejected as e:
+            print(f"rejected: {e}")
+    print(f"placement: { {w: list(placed.values()).count(w) for w in supervisor.workers} }")
+
+    lag_samples = {w: [] for w in supervisor.workers}
+    started = time.monotonic()
+    killed = False
+    while time.monotonic() - started < args.seconds + 2:
+        await asyncio.sleep(1.0)
+        if args.kill_after is not None and not killed and time.monotonic() - started >= args.kill_after:
+            pid = supervisor.workers[0].pid
+            print(f"killing worker 0 (pid {pid})")
+            os.kill(pid, signal.SIGKILL)
+            killed = True
+        for worker_id, w in supervisor.stats()["workers"].items():
+            if w.get("active"):
+                lag_samples[worker_id].append(w["loop_lag_p95_ms"])
+        supervisor.log_stats()
+
+    s = supervisor.stats()
+    print(f"\nworkers: {args.workers}  calls: {args.calls}  crashes: {s['crashes']}")
+    for worker_id, w in s["workers"].items():
+        print(
+            f"  worker {worker_id}: loop lag p95 {w.get('loop_lag_p95_ms', 0):g} ms, max {w.get('loop_lag_max_ms', 0):.1f} ms, "
+            f"{w.get('finished', 0)} calls finished, {w['restarts']} restarts, {w['lost_sessions']} lost"
+        )
+    await supervisor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Offline accuracy vs CPU for the VAD backends (energy, webrtc, cascade, cascade+confirm).
+
+Runs every backend over 30 ms frames of each WAV (16-bit mono, 8/16/32/48 kHz) and
+reports frame accuracy, false-alarm / miss rates and CPU seconds per second of audio.
+Ground truth comes from a sidecar `<file>.labels.json` holding speech segments as
+[[start_s, end_s], ...]; without one, agreement with plain webrtcvad is reported
+instead. With no files, a labelled synthetic call (voiced bursts, line noise,
+a hiss burst and silence) is generated.
+
+    python -m src.scripts.bench_vad [recording.wav ...]
+"""
+import json
+import os
+import sys
+import wave
+
+import numpy as np
+
+from src.agent.voice.vad_backends import (
+    CascadeVADBackend,
+    EnergyVADBackend,
+    WebRtcVADBackend,
+)
+
+FRAME_MS = 30
+WINDOW = 3  # sub-frames per analysis window
+AGGRESSIVENESS = 1  # same as the agent
+
+
+def backends():
+    return {
+        "energy": EnergyVADBackend(),
+        "webrtc": WebRtcVADBackend(AGGRESSIVENESS),
+        "cascade": CascadeVADBackend(AGGRESSIVENESS),
+        "cascade+confirm": CascadeVADBackend(AGGRESSIVENESS, confirm=EnergyVADBackend(speech_db=-50.0)),
+    }
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        return f.readframes(f.getnframes()), f.getframerate()
+
+
+def read_labels(path, n_frames):
+    labels_path = os.path.splitext(path)[0] + ".labels.json"
+    if not os.path.exists(labels_path):
+        return None
+    with open(labels_path) as f:
+        segments = json.load(f)
+    labels = np.zeros(n_frames, dtype=bool)
+    for start_s, end_s in segments:
+        labels[int(start_s * 1000 // FRAME_MS):int(np.ceil(end_s * 1000 / FRAME_MS))] = True
+    return labels
+
+
+def synthetic_call(rate=16000, seconds=60, seed=0):
+    """Voiced bursts (harmonic stack with syllable-rate AM) over quiet line noise."""
+    rng = np.random.default_rng(seed)
+    n = rate * seconds
+    x = rng.standard_normal(n) * 15  # ~ -67 dBFS line noise
+    labels = np.zeros(n, dtype=bool)
+    t = np.arange(n) / rate
+    pos = rate
+    while pos < n - 2 * rate:
+        length = int(rng.uniform(0.8, 2.5) * rate)
+        seg = slice(pos, pos + length)
+        f0 = rng.uniform(100, 220) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t[seg]))
+        phase = 2 * np.pi * np.cumsum(f0) / rate
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+        envelope = 0.5 * (1 - np.cos(2 * np.pi * 4 * t[seg])) ** 2
+        x[seg] += voiced * envelope * rng.uniform(2000, 6000)
+        labels[seg] = True
+        pos += length + int(rng.uniform(1.0, 5.0) * rate)  # the caller is mostly listening
+    # A hiss burst (e.g. line noise spike) that isn't speech
+    burst = slice(n - rate, n - rate // 2)
+    x[burst] += rng.standard_normal(burst.stop - burst.start) * 1500
+    pcm = np.clip(x, -32768, 32767).astype(np.int16).tobytes()
+    step = rate * FRAME_MS // 1000
+    frame_labels = labels[: len(labels) - len(labels) % step].reshape(-1, step).mean(axis=1) >= 0.5
+    return pcm, rate, frame_labels
+
+
+def run(pcm, rate, labels):
+    step = rate * FRAME_MS // 1000 * 2
+    view = memoryview(pcm)
+    offsets = range(0, len(view) - len(view) % step, step)
+    results = {}
+    for name, backend in backends().items():
+        # Same 90 ms windows the agent's analyzer hands to the backend
+        decisions = np.array(
+            [d for o in range(0, len(offsets) * step, WINDOW * step)
+             for d in backend.evaluate(view[o:min(o + WINDOW * step, len(offsets) * step)], step, rate)],
+            dtype=bool,
+        )
+        results[name] = (decisions, backend)
+    if labels is None:
+        labels = results["webrtc"][0]
+        print("  (no labels: scores are agreement with webrtc)")
+    labels = labels[: len(offsets)]
+
+    print(f"  {'backend':<16} {'accuracy':>8} {'false-alarm':>11} {'miss':>6} {'cpu/audio-s':>12} {'gated':>6}")
+    for name, (decisions, backend) in results.items():
+        decisions = decisions[: len(labels)]
+        accuracy = np.mean(decisions == labels)
+        false_alarm = np.mean(decisions[~labels]) if (~labels).any() else 0.0
+        miss = np.mean(~decisions[labels]) if labels.any() else 0.0
+        gated = backend.stats().get("gated_fraction")
+        gated = f"{gated:6.0%}" if gated is not None else f"{'-':>6}"
+        print(
+            f"  {name:<16} {accuracy:8.1%} {false_alarm:11.1%} {miss:6.1%} "
+            f"{backend.cpu_per_audio_second * 1e3:9.3f} ms {gated}"
+        )
+
+
+def main(paths):
+    if not paths:
+        pcm, rate, labels = synthetic_call()
+        print(f"synthetic call, {len(pcm) // 2 / rate:.0f} s @ {rate} Hz")
+        run(pcm, rate, labels)
+        return
+    for path in paths:
+        pcm, rate = read_wav(path)
+        step = rate * FRAME_MS // 1000 * 2
+        print(f"{path}, {len(pcm) // 2 / rate:.1f} s @ {rate} Hz")
+        run(pcm, rate, read_labels(path, len(pcm) // step))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
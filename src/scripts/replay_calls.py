@@ -0,0 +1,78 @@
+"""
+Batch replay of recorded IVR calls through the agent, headless.
+
+Each recording (WAV, or 16 kHz 16-bit PCM) is replayed as the caller through a
+FileAudioTransport; the agent's audio goes to OUT/<name>.wav, with when it spoke in
+OUT/<name>.jsonl. Up to `--concurrency` calls run at once on one event loop
+(SessionManager), sharing one HTTP pool. Needs the API keys; `--speed 0` replays
+as fast as the services keep up (reply timestamps then only show ordering).
+
+    python -m src.scripts.replay_calls recordings/*.wav --out replies/ [--concurrency 8] [--speed 1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from loguru import logger
+
+from src.agent.net.http_pool import HTTPPool
+from src.agent.sessions import SessionManager, agent_builder
+
+
+def summarize(segments_path: str) -> dict:
+    if not os.path.exists(segments_path):
+        return {"replies": 0, "first_reply_s": None, "spoken_s": 0.0}
+    with open(segments_path) as f:
+        segments = [json.loads(line) for line in f if line.strip()]
+    return {
+        "replies": len(segments),
+        "first_reply_s": segments[0]["start_s"] if segments else None,
+        "spoken_s": round(sum(s["end_s"] - s["start_s"] for s in segments), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--out", default="replies")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--mute", action="store_true", help="No TTS: only transcripts and tool calls")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    http_pool = HTTPPool()
+    manager = SessionManager(agent_builder(http_pool=http_pool, mute_tts=args.mute), max_sessions=args.concurrency)
+    slots = asyncio.Semaphore(args.concurrency)
+    results = {}
+
+    async def replay(path: str):
+        name = os.path.splitext(os.path.basename(path))[0]
+        out = os.path.join(args.out, f"{name}.wav")
+        async with slots:
+            start = time.monotonic()
+            session = await manager.start(name, audio_in_file=path, audio_out_file=out, audio_speed=args.speed)
+            await session.wait()
+            results[name] = {
+                "wall_s": round(time.monotonic() - start, 1),
+                "error": repr(session.error) if session.error else None,
+                **summarize(os.path.splitext(out)[0] + ".jsonl"),
+            }
+        print(f"{name}: {results[name]}", file=sys.stderr)
+
+    started = time.monotonic()
+    await asyncio.gather(*(replay(path) for path in args.recordings))
+    await manager.stop_all()
+    await http_pool.close()
+
+    failed = sum(1 for r in results.values() if r["error"])
+    silent = sum(1 for r in results.values() if not r["replies"])
+    print(f"{len(results)} calls in {time.monotonic() - started:.1f}s, {failed} failed, {silent} without a spoken reply")
+    logger.info(f"Loop lag: {manager.stats()['loop_lag']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())